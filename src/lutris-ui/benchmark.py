@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+
+# Frame time benchmark with the installed Lutris games
+# Usage: benchmark.py [wheel|flick|select|stick|zoom|redraw] [frames]
+#        benchmark.py --replay <file recorded by lutris-ui.py --record> [--speed n]
+
+from __future__ import annotations
+
+from os import environ
+from sys import argv
+from time import perf_counter
+from typing import Callable
+
+from lutrisuiapp import LutrisUiApp, get_controls_options
+from pygame import constants, event
+from pygame import quit as pygame_quit
+from settings import Settings
+from uigamelist import ZOOM_LEVELS, TileGeometry, UiGameViewport
+from uiwidgets import Controls, ReplayControls
+
+FRAME_BUDGET = 1000 / 30  # ms, Controls.game_tick() limit
+
+
+def get_viewport(app: LutrisUiApp) -> UiGameViewport:
+    viewport = app.games_viewport.viewport_widget
+    assert isinstance(viewport, UiGameViewport)
+    return viewport
+
+
+def post_command(command: str) -> None:
+    event.post(event.Event(Controls.COMMAND_EVENT, command=command, origin=None))
+
+
+def scenario_wheel(app: LutrisUiApp, frame: int) -> None:
+    # 2 wheel steps every 5th frame, direction changes each 150 frames
+    if frame % 5 == 0:
+        direction = -1 if frame % 300 < 150 else 1
+        event.post(
+            event.Event(
+                constants.MOUSEWHEEL,
+                x=0,
+                y=2 * direction,
+                flipped=False,
+                touch=False,
+                precise_x=0.0,
+                precise_y=float(2 * direction),
+            )
+        )
+
+
+def scenario_flick(app: LutrisUiApp, frame: int) -> None:
+    viewport = get_viewport(app)
+    if viewport.is_scrolling() is False:
+        max_x, max_y = viewport.get_max_shift()
+        velocity = 3000 if viewport.shift_y < max_y / 2 else -3000
+        viewport.fling(0, velocity)
+
+
+def scenario_select(app: LutrisUiApp, frame: int) -> None:
+    if frame % 3 == 0:
+        post_command("DOWN" if frame % 600 < 300 else "UP")
+
+
+def scenario_stick(app: LutrisUiApp, frame: int) -> None:
+    # Left stick at full deflection, direction changes at the first and last game
+    viewport = get_viewport(app)
+    focus_index = getattr(viewport.focus_child, "list_index", 0)
+    if frame == 0 or focus_index in (0, len(viewport.game_widgets) - 1):
+        value = 1.0 if frame == 0 or focus_index == 0 else -1.0  # 1.0 is DOWN
+        event.post(
+            event.Event(
+                constants.JOYAXISMOTION,
+                instance_id=0,
+                axis=constants.CONTROLLER_AXIS_LEFTY,
+                value=value,
+                joy=0,
+            )
+        )
+
+
+def scenario_zoom(app: LutrisUiApp, frame: int) -> None:
+    # Next zoom level every 10th frame, through all levels and back.
+    # The geometry is set directly, so the zoom is not saved in the config
+    if frame % 10 != 0:
+        return
+    step = frame // 10 % (2 * len(ZOOM_LEVELS) - 2)
+    if step >= len(ZOOM_LEVELS):
+        step = 2 * len(ZOOM_LEVELS) - 2 - step
+    settings = Settings.get_snapshot().game_widget
+    get_viewport(app).set_geometry(TileGeometry(settings, ZOOM_LEVELS[step]))
+
+
+def scenario_redraw(app: LutrisUiApp, frame: int) -> None:
+    # Compose and blit all visible tiles including covers
+    viewport = get_viewport(app)
+    visible_rect = viewport.get_visible_rect()
+    for widget in viewport.game_widgets:
+        if widget.get_rect(with_borders=True).colliderect(visible_rect):
+            widget.set_changed()
+
+
+SCENARIOS: dict[str, Callable[[LutrisUiApp, int], None]] = {
+    "wheel": scenario_wheel,
+    "flick": scenario_flick,
+    "select": scenario_select,
+    "stick": scenario_stick,
+    "zoom": scenario_zoom,
+    "redraw": scenario_redraw,
+}
+
+
+def run_benchmark(app: LutrisUiApp, scenario: str, frames: int) -> list[float]:
+    scenario_step = SCENARIOS[scenario]
+    frame_times = []
+    app.controls.init()
+    get_viewport(app).smooth_scroll = True
+    app.draw()
+    for frame in range(frames):
+        scenario_step(app, frame)
+        app.controls.request_frame()
+        app.controls.update_controls()
+        start = perf_counter()
+        app.process_tick()
+        app.process_events(app.controls.events)
+        app.draw()
+        frame_times.append((perf_counter() - start) * 1000)
+        if app.exit_loop is True:
+            break
+        app.controls.game_tick()
+    return frame_times
+
+
+def run_replay(app: LutrisUiApp) -> list[float]:
+    # Like UiApp.run(), until the end of recording
+    frame_times = []
+    app.controls.init()
+    while True:
+        app.controls.update_controls()
+        start = perf_counter()
+        app.process_tick()
+        if app.exit_loop is True:
+            break
+        app.process_events(app.controls.events)
+        if app.exit_loop is True:
+            break
+        app.draw()
+        frame_times.append((perf_counter() - start) * 1000)
+        app.controls.game_tick()
+    return frame_times
+
+
+def get_argument(option: str) -> str | None:
+    if option in argv and argv.index(option) + 1 < len(argv):
+        return argv[argv.index(option) + 1]
+    return None
+
+
+def print_result(scenario: str, frame_times: list[float]) -> None:
+    if not frame_times:
+        return
+    frame_times_sorted = sorted(frame_times)
+    p95 = frame_times_sorted[int(len(frame_times_sorted) * 0.95)]
+    over_budget = len([t for t in frame_times if t > FRAME_BUDGET])
+    print(
+        f"{scenario}: {len(frame_times)} frames, "
+        f"avg {sum(frame_times) / len(frame_times):.2f} ms, "
+        f"p95 {p95:.2f} ms, max {frame_times_sorted[-1]:.2f} ms, "
+        f"over budget {over_budget}"
+    )
+
+
+if __name__ == "__main__":
+    replay_file = get_argument("--replay")
+    if replay_file is not None:
+        environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        speed = float(get_argument("--speed") or 0)
+        replay_app = LutrisUiApp(
+            ReplayControls(replay_file, speed, **get_controls_options())
+        )
+        print_result("replay", run_replay(replay_app))
+    else:
+        scenarios = [a for a in argv[1:] if a in SCENARIOS] or list(SCENARIOS)
+        frames = next((int(a) for a in argv[1:] if a.isdigit()), 600)
+        # Key mappings of Lutris-UI for repeats, only the benchmark events
+        options = get_controls_options()
+        options["allowed_event_types"] = [
+            constants.MOUSEWHEEL,
+            constants.WINDOWSIZECHANGED,
+            constants.QUIT,
+        ]
+        ctr = Controls(**options)
+        bench_app = LutrisUiApp(ctr)
+        for name in scenarios:
+            print_result(name, run_benchmark(bench_app, name, frames))
+    pygame_quit()
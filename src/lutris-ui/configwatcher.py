@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import struct
+from threading import Thread
+from time import sleep
+from typing import Callable
+
+from settings import Settings
+
+# inotify(7) constants
+IN_CLOEXEC = 0o2000000
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+POLL_INTERVAL = 1  # s, mtime check if inotify is not usable
+SETTLE_TIME = 0.2  # s, editors write the file in several steps
+
+
+# Watch the config files in a background thread. on_change is called from the
+# watcher thread, it should only wake up the main loop that calls Settings.reload()
+class ConfigWatcher:
+    def __init__(self, on_change: Callable[[], None]):
+        self.on_change = on_change
+        self.config_files = Settings.get_config_files()
+        self._thread: Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        inotify_fd = self._init_inotify()
+        if inotify_fd is None:
+            self._thread = Thread(target=self._poll_mtimes, daemon=True)
+        else:
+            self._thread = Thread(
+                target=self._read_inotify, args=(inotify_fd,), daemon=True
+            )
+        self._thread.start()
+
+    def _init_inotify(self) -> int | None:
+        # The directories are watched, so also replaced or new files are noticed
+        config_dirs = {os.path.dirname(f) for f in self.config_files}
+        config_dirs = {d for d in config_dirs if os.path.isdir(d)}
+        if not config_dirs:
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            inotify_fd = libc.inotify_init1(IN_CLOEXEC)
+        except (OSError, AttributeError) as e:
+            print(f"inotify not available: {e}")
+            return None
+        if inotify_fd < 0:
+            return None
+        for config_dir in config_dirs:
+            if libc.inotify_add_watch(inotify_fd, config_dir.encode(), WATCH_MASK) < 0:
+                os.close(inotify_fd)
+                return None
+        return inotify_fd
+
+    def _read_inotify(self, inotify_fd: int) -> None:
+        while True:
+            data = os.read(inotify_fd, 4096)
+            changed = False
+            offset = 0
+            while offset < len(data):
+                _, _, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset : offset + name_len].rstrip(b"\0")
+                offset += name_len
+                if name == b"config.ini":
+                    changed = True
+            if changed is True:
+                sleep(SETTLE_TIME)
+                self.on_change()
+
+    def _get_mtimes(self) -> list[float | None]:
+        mtimes: list[float | None] = []
+        for config_file in self.config_files:
+            try:
+                mtimes.append(os.stat(config_file).st_mtime)
+            except OSError:
+                mtimes.append(None)
+        return mtimes
+
+    def _poll_mtimes(self) -> None:
+        mtimes = self._get_mtimes()
+        while True:
+            sleep(POLL_INTERVAL)
+            new_mtimes = self._get_mtimes()
+            if new_mtimes != mtimes:
+                mtimes = new_mtimes
+                sleep(SETTLE_TIME)
+                self.on_change()
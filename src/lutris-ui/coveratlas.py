@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import json
+import mmap
+from fcntl import LOCK_EX, LOCK_NB, flock
+from os import path, replace, stat
+from threading import Lock
+
+from pygame import Rect, Surface, display, image
+from settings import Settings
+
+ATLAS_CHUNK_SLOTS = 64  # Covers per mapped chunk
+
+
+def get_atlas_format() -> str:
+    # image.frombuffer() format closest to the display pixel format
+    display_surface = display.get_surface()
+    if display_surface is not None and display_surface.get_bytesize() == 4:
+        if display_surface.get_masks()[:3] == (0xFF0000, 0xFF00, 0xFF):
+            return "BGRA"
+    return "RGBX"
+
+
+# Covers scaled to one tile size, stored in a memory mapped cache file.
+# Each cover uses a fixed slot. The file is mapped in chunks, so the file can grow
+# without moving already returned cover surfaces.
+# Only one process adds covers, other launchers use the atlas read only
+class CoverAtlas:
+    def __init__(self, size: tuple[int, int]):
+        self.size = size
+        self.format = get_atlas_format()
+        width, height = size
+        self._slot_bytes = width * height * 4
+        self._chunk_bytes = ATLAS_CHUNK_SLOTS * self._slot_bytes
+        # Chunk offsets needs to be aligned for mmap
+        self._chunk_bytes += -self._chunk_bytes % mmap.ALLOCATIONGRANULARITY
+        name = f"covers-{width}x{height}"
+        self._atlas_file = Settings.get_cache_path(f"{name}.atlas")
+        self._index_file = Settings.get_cache_path(f"{name}.json")
+        self._index: dict[str, list] = {}  # coverart: [slot, mtime, width, height]
+        self._index_changed = False
+        self._chunks: list[tuple[mmap.mmap, Surface]] = []
+        self._lock = Lock()
+        self.load_index()
+        self._file = open(self._atlas_file, "a+b")
+        try:
+            flock(self._file, LOCK_EX | LOCK_NB)
+            self.read_only = False
+        except BlockingIOError:
+            self.read_only = True
+        self._next_slot = max(
+            (entry[0] + 1 for entry in self._index.values()), default=0
+        )
+
+    def load_index(self) -> None:
+        if not path.isfile(self._index_file) or not path.isfile(self._atlas_file):
+            return
+        try:
+            with open(self._index_file) as f:
+                index = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Cover atlas index not loaded: {e}")
+            return
+        if index.get("format") != self.format or index.get("size") != list(self.size):
+            return  # Display format or tile size changed
+        self._index = index.get("covers", {})
+
+    def save_index(self) -> None:
+        if self.read_only is True or self._index_changed is False:
+            return
+        with self._lock:
+            index = {"format": self.format, "size": self.size, "covers": self._index}
+            self._index_changed = False
+        temp_file = f"{self._index_file}.tmp"
+        with open(temp_file, "w") as f:
+            json.dump(index, f)
+        replace(temp_file, self._index_file)
+
+    def _get_chunk(self, chunk_idx: int) -> tuple[mmap.mmap, Surface] | None:
+        # None if the read only file does not contain the chunk yet
+        while len(self._chunks) <= chunk_idx:
+            offset = len(self._chunks) * self._chunk_bytes
+            if self.read_only is True:
+                access = mmap.ACCESS_READ
+                if stat(self._atlas_file).st_size < offset + self._chunk_bytes:
+                    return None
+            else:
+                access = mmap.ACCESS_WRITE
+                if stat(self._atlas_file).st_size < offset + self._chunk_bytes:
+                    self._file.truncate(offset + self._chunk_bytes)  # Sparse file
+            chunk_map = mmap.mmap(
+                self._file.fileno(), self._chunk_bytes, access=access, offset=offset
+            )
+            width, height = self.size
+            # The chunk is padded to the alignment, frombuffer needs the exact length
+            chunk_surface = image.frombuffer(
+                memoryview(chunk_map)[: ATLAS_CHUNK_SLOTS * self._slot_bytes],
+                (width, height * ATLAS_CHUNK_SLOTS),
+                self.format,
+            )
+            chunk_surface.set_alpha(None)  # Opaque, no per pixel blending
+            self._chunks.append((chunk_map, chunk_surface))
+        return self._chunks[chunk_idx]
+
+    def get_cover(self, coverart: str, mtime: float) -> Surface | None:
+        with self._lock:
+            entry = self._index.get(coverart)
+            if entry is None or entry[1] != mtime:
+                return None
+            slot, _, width, height = entry
+            chunk_idx, chunk_slot = divmod(slot, ATLAS_CHUNK_SLOTS)
+            chunk = self._get_chunk(chunk_idx)
+            if chunk is None:
+                return None
+            _, chunk_surface = chunk
+        return chunk_surface.subsurface(
+            Rect(0, chunk_slot * self.size[1], width, height)
+        )
+
+    def add_cover(self, coverart: str, mtime: float, cover: Surface) -> Surface:
+        if self.read_only is True:
+            return cover
+        width = min(cover.get_width(), self.size[0])
+        height = min(cover.get_height(), self.size[1])
+        if (width, height) != cover.get_size():
+            # Keep the center like the tile does
+            crop_x = (cover.get_width() - width) // 2
+            crop_y = (cover.get_height() - height) // 2
+            cover = cover.subsurface(Rect(crop_x, crop_y, width, height))
+        pixels = image.tobytes(cover, self.format)
+        row_bytes = width * 4
+        with self._lock:
+            entry = self._index.get(coverart)
+            slot = entry[0] if entry is not None else self._next_slot
+            if entry is None:
+                self._next_slot += 1
+            chunk_idx, chunk_slot = divmod(slot, ATLAS_CHUNK_SLOTS)
+            chunk = self._get_chunk(chunk_idx)
+            assert chunk  # Writable chunks are always mapped
+            chunk_map, _ = chunk
+            slot_offset = chunk_slot * self._slot_bytes
+            slot_row_bytes = self.size[0] * 4
+            for row in range(height):
+                offset = slot_offset + row * slot_row_bytes
+                chunk_map[offset : offset + row_bytes] = pixels[
+                    row * row_bytes : (row + 1) * row_bytes
+                ]
+            self._index[coverart] = [slot, mtime, width, height]
+            self._index_changed = True
+        atlas_cover = self.get_cover(coverart, mtime)
+        assert atlas_cover
+        return atlas_cover
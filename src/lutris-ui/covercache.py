@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from os import path
+from threading import Condition, Thread
+
+from coveratlas import CoverAtlas
+from pygame import Surface, image, transform
+from settings import Settings
+from uiwidgets import SurfaceFactory, Tracer
+
+
+def scale_cover(img: Surface, size: tuple[int, int]) -> Surface:
+    max_w, max_h = size
+    orig_h = img.get_height()
+    orig_w = img.get_width()
+
+    if orig_h > orig_w * 1.4:
+        zoom_factor = max_h / orig_h
+    else:
+        zoom_factor = max_w / orig_w
+    return SurfaceFactory.convert(transform.scale_by(img, zoom_factor))
+
+
+@Tracer.traced("cover")
+def load_cover(coverart: str, size: tuple[int, int]) -> Surface:
+    return scale_cover(image.load(coverart), size)
+
+
+# Scaled cover art by file and size. Covers are decoded on demand in main thread,
+# or ahead of time in a worker thread by prefetch(). A missing size is scaled down
+# from a larger cached size or the atlas if possible, so zooming does not decode
+class CoverCache:
+    def __init__(self):
+        settings = Settings.get_snapshot().game_widget
+        self.max_covers = settings.cover_cache_size
+        self.use_atlas = settings.cover_atlas
+        self._atlas: CoverAtlas | None = None
+        self._covers: OrderedDict[tuple[str, tuple[int, int]], Surface] = OrderedDict()
+        self._cover_sizes: dict[str, set[tuple[int, int]]] = {}  # Cached sizes
+        self._jobs: list[tuple[str, tuple[int, int]]] = []
+        self._condition = Condition()
+        self._worker: Thread | None = None
+        self._generation = SurfaceFactory.generation
+
+    def get_cover(self, coverart: str, size: tuple[int, int]) -> Surface:
+        cache_key = (coverart, size)
+        with self._condition:
+            if self._generation != SurfaceFactory.generation:
+                # Display format changed
+                self._generation = SurfaceFactory.generation
+                self._covers.clear()
+                self._cover_sizes.clear()
+            cover = self._covers.get(cache_key)
+            if cover is not None:
+                self._covers.move_to_end(cache_key)
+                return cover
+            if cache_key in self._jobs:
+                self._jobs.remove(cache_key)
+
+        cover = self._load_cover(coverart, size)
+        with self._condition:
+            self._add_cover(cache_key, cover)
+        return cover
+
+    def set_atlas_size(self, size: tuple[int, int]) -> None:
+        # Covers in this size are stored in the atlas file
+        if self.use_atlas is False:
+            return
+        if self._atlas is not None:
+            if self._atlas.size == size:
+                return
+            self._atlas.save_index()
+        try:
+            self._atlas = CoverAtlas(size)
+        except OSError as e:
+            print(f"Cover atlas disabled: {e}")
+            self._atlas = None
+
+    def save(self) -> None:
+        if self._atlas is not None:
+            self._atlas.save_index()
+
+    @Tracer.traced("cover")
+    def _load_cover(self, coverart: str, size: tuple[int, int]) -> Surface:
+        atlas = self._atlas
+        if atlas is not None and atlas.size == size:
+            return self._load_atlas_cover(atlas, coverart)
+        source = self._get_larger_cover(coverart, size)
+        if source is None and atlas is not None:
+            if atlas.size[0] >= size[0] and atlas.size[1] >= size[1]:
+                source = self._load_atlas_cover(atlas, coverart)
+        if source is None:
+            return load_cover(coverart, size)
+        return scale_cover(source, size)
+
+    def _get_larger_cover(self, coverart: str, size: tuple[int, int]) -> Surface | None:
+        # Smallest cached size of the cover that is not smaller than size
+        with self._condition:
+            larger_sizes = [
+                cover_size
+                for cover_size in self._cover_sizes.get(coverart, ())
+                if cover_size[0] >= size[0] and cover_size[1] >= size[1]
+            ]
+            if not larger_sizes:
+                return None
+            return self._covers[(coverart, min(larger_sizes))]
+
+    @staticmethod
+    def _load_atlas_cover(atlas: CoverAtlas, coverart: str) -> Surface:
+        mtime = path.getmtime(coverart)
+        cover = atlas.get_cover(coverart, mtime)
+        if cover is None:
+            cover = atlas.add_cover(coverart, mtime, load_cover(coverart, atlas.size))
+        return cover
+
+    def prefetch(self, coverarts: list[str], size: tuple[int, int]) -> None:
+        # Replace pending jobs. Not started jobs for the old direction are stale
+        with self._condition:
+            self._jobs = [
+                (coverart, size)
+                for coverart in coverarts
+                if (coverart, size) not in self._covers
+            ]
+            self._jobs.reverse()  # pop() from the end
+            if self._jobs:
+                self._condition.notify()
+        if self._worker is None:
+            self._worker = Thread(target=self._run_worker, daemon=True)
+            self._worker.start()
+
+    def trim(self, max_covers: int) -> None:
+        # Drop the least recently used covers
+        with self._condition:
+            while len(self._covers) > max_covers:
+                self._drop_oldest()
+
+    def cancel_prefetch(self) -> None:
+        with self._condition:
+            self._jobs.clear()
+
+    def _add_cover(self, cache_key: tuple[str, tuple[int, int]], cover: Surface):
+        self._covers[cache_key] = cover
+        self._covers.move_to_end(cache_key)
+        coverart, size = cache_key
+        self._cover_sizes.setdefault(coverart, set()).add(size)
+        while len(self._covers) > self.max_covers:
+            self._drop_oldest()
+
+    def _drop_oldest(self) -> None:
+        (coverart, size), _ = self._covers.popitem(last=False)
+        cover_sizes = self._cover_sizes[coverart]
+        cover_sizes.discard(size)
+        if not cover_sizes:
+            del self._cover_sizes[coverart]
+
+    def _run_worker(self) -> None:
+        while True:
+            with self._condition:
+                while not self._jobs:
+                    self._condition.wait()
+                cache_key = self._jobs.pop()
+                if cache_key in self._covers:
+                    continue
+
+            try:
+                cover = self._load_cover(*cache_key)
+            except Exception as e:
+                print(f"Cover {cache_key[0]} not loaded: {e}")
+                continue
+
+            with self._condition:
+                if cache_key not in self._covers:
+                    self._add_cover(cache_key, cover)
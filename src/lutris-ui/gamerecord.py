@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+
+# Compact game entry holding only the columns used by the UI.
+# The full Lutris database row is fetched by LutrisDb when needed
+class GameRecord:
+    __slots__ = (
+        "id",
+        "name",
+        "sortname",
+        "slug",
+        "runner",
+        "platform",
+        "lastplayed",
+        "installed_at",
+        "playtime",
+        "coverart",
+    )
+
+    def __init__(self, game_data: dict, coverart: str | None = None):
+        self.id: int = game_data["id"]
+        self.name: str = game_data["name"]
+        self.sortname: str = game_data.get("sortname") or ""
+        self.slug: str = game_data["slug"]
+        self.runner: str = game_data.get("runner") or ""
+        self.platform: str = game_data.get("platform") or ""
+        self.lastplayed: int = game_data.get("lastplayed") or 0
+        self.installed_at: int = game_data.get("installed_at") or 0
+        self.playtime: float = game_data.get("playtime") or 0
+        self.coverart: str | None = coverart
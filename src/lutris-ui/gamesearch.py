@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from gamerecord import GameRecord
+
+
+# Trigram postings over game names and sortnames.
+# Results are game indexes in the list the index was built from
+class GameSearchIndex:
+    def __init__(self, games: list[GameRecord]):
+        self._texts: list[str] = []
+        self._trigrams: dict[str, set[int]] = {}
+        for idx, game in enumerate(games):
+            text = f"{self.normalize(game.name)}\n{self.normalize(game.sortname)}"
+            self._texts.append(text)
+            for pos in range(len(text) - 2):
+                trigram = text[pos : pos + 3]
+                postings = self._trigrams.get(trigram)
+                if postings is None:
+                    self._trigrams[trigram] = {idx}
+                else:
+                    postings.add(idx)
+        self._last_query = ""
+        self._last_result: set[int] | None = None
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(text.casefold().split())
+
+    def search(self, query: str) -> set[int] | None:
+        query = self.normalize(query)
+        if not query:
+            self._last_query = ""
+            self._last_result = None
+            return None
+
+        if self._last_result is not None and self._last_query in query:
+            # Typing narrows the previous result
+            candidates = self._last_result
+        elif len(query) >= 3:
+            postings = sorted(
+                (
+                    self._trigrams.get(query[pos : pos + 3], set())
+                    for pos in range(len(query) - 2)
+                ),
+                key=len,
+            )
+            candidates = postings[0].intersection(*postings[1:])
+        else:
+            candidates = range(len(self._texts))
+
+        result = {idx for idx in candidates if query in self._texts[idx]}
+        self._last_query = query
+        self._last_result = result
+        return result
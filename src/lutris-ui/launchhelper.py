@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import os
+import select
+import shlex
+import signal
+import subprocess
+import sys
+
+HELPER_TIMEOUT = 2  # s, wait for the pid of the launched game
+
+
+# Client for a helper process with Lutris already imported. The protocol is line based
+# over stdin/stdout: the helper writes "ready" once it can launch games. Then lutris-ui
+# writes the game id, the helper answers with the pid of the started Lutris session or
+# "error <message>". Any program speaking this protocol can be used as launch_helper
+class LaunchHelper:
+    def __init__(self, command: str = ""):
+        if command:
+            self.command = shlex.split(command)
+        else:
+            self.command = [sys.executable, os.path.realpath(__file__)]
+        self._process: subprocess.Popen | None = None
+        self._ready = False
+
+    def start(self) -> None:
+        if self._process is not None and self._process.poll() is None:
+            return
+        try:
+            self._process = subprocess.Popen(
+                self.command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+            )
+            self._ready = False
+        except OSError as e:
+            print(f"Launch helper not started: {e}")
+            self._process = None
+
+    def stop(self) -> None:
+        # Killed, a game id still in the pipe must not be launched after the fallback
+        if self._process is None:
+            return
+        self._process.kill()
+        self._process.wait()
+        self._process = None
+        self._ready = False
+
+    def is_ready(self) -> bool:
+        process = self._process
+        if self._ready is True or process is None:
+            return self._ready
+        assert process.stdout
+        ready, _, _ = select.select([process.stdout], [], [], 0)
+        if not ready:
+            return False  # Still importing Lutris
+        answer = process.stdout.readline().strip()
+        if answer != "ready":
+            print(f"Launch helper failed: {answer or 'exited'}")
+            self.stop()
+            return False
+        self._ready = True
+        return True
+
+    def launch(self, game_id: int) -> int | None:
+        # Returns None if the game needs to be launched the usual way
+        process = self._process
+        if process is None or process.poll() is not None:
+            self.start()  # Ready for the next launch
+            return None
+        if self.is_ready() is False:
+            return None
+        assert process.stdin and process.stdout
+        try:
+            process.stdin.write(f"{game_id}\n")
+            process.stdin.flush()
+        except OSError as e:
+            print(f"Launch helper failed: {e}")
+            self.stop()
+            return None
+        # Blocks the UI at most HELPER_TIMEOUT, the helper answers right after fork
+        ready, _, _ = select.select([process.stdout], [], [], HELPER_TIMEOUT)
+        if ready:
+            answer = process.stdout.readline().strip() or "exited"
+        else:
+            # Killed before the fallback. A pid written meanwhile is still in the pipe,
+            # the session was forked then. Killed between fork and answer the game
+            # is launched twice
+            self.stop()
+            ready, _, _ = select.select([process.stdout], [], [], 0)
+            answer = process.stdout.readline().strip() if ready else ""
+            answer = answer or "error timeout"
+        if answer.isdigit():
+            return int(answer)
+        print(f"Launch helper failed: {answer}")
+        self.stop()
+        return None
+
+
+def run_helper() -> None:
+    # Import Lutris once, then fork a Lutris session for each requested game
+    from lutris.gui.application import Application
+
+    answers = os.fdopen(os.dup(sys.stdout.fileno()), "w", buffering=1)
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())  # Keep the pipe for answers
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)  # Sessions are not waited for
+    answers.write("ready\n")
+    for line in sys.stdin:
+        game_id = line.strip()
+        if not game_id.isdigit():
+            answers.write(f"error invalid game id {game_id}\n")
+            continue
+        pid = os.fork()
+        if pid == 0:
+            answers.close()
+            os.setsid()
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            os.environ["LUTRIS_SKIP_INIT"] = "1"
+            os._exit(Application().run(["lutris", f"lutris:rungameid/{game_id}"]))
+        answers.write(f"{pid}\n")
+
+
+if __name__ == "__main__":
+    run_helper()
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import json
+from os import path, replace
+from time import time
+
+from settings import Settings
+
+LAUNCH_TIMEOUT = 60  # s, stop waiting for the game process
+LAUNCH_HISTORY_SIZE = 20  # Launches kept per game
+
+
+# Timing of the current launch. Marks in order: input, popen, wrapper, first_child
+# and exit, in seconds since the launch input was read
+class LaunchTimer:
+    def __init__(self, game_id: int, start_time: float):
+        self.game_id = game_id
+        self.start_time = start_time
+        self.launch_time = time()  # Wall clock for the history
+        self.marks: dict[str, float] = {}
+
+    def mark(self, name: str) -> None:
+        if name not in self.marks:
+            self.marks[name] = round(time() - self.start_time, 3)
+
+    def has(self, name: str) -> bool:
+        return name in self.marks
+
+    def is_starting(self) -> bool:
+        # Game process not seen yet
+        return (
+            "first_child" not in self.marks
+            and "exit" not in self.marks
+            and time() - self.start_time < LAUNCH_TIMEOUT
+        )
+
+    def get_text(self) -> str:
+        names = {"popen": "Lutris", "wrapper": "Wrapper", "first_child": "Game"}
+        return "   ".join(
+            f"{label} {self.marks[name]:.1f}s"
+            for name, label in names.items()
+            if name in self.marks
+        )
+
+
+# Launch timings per game, stored in the data directory
+class LaunchHistory:
+    def __init__(self):
+        self._history_file = Settings.get_data_path("launch_history.json")
+        self._history: dict[str, list[dict]] = {}
+        if path.isfile(self._history_file):
+            try:
+                with open(self._history_file) as f:
+                    self._history = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Launch history not loaded: {e}")
+
+    def add(self, timer: LaunchTimer) -> None:
+        launches = self._history.setdefault(str(timer.game_id), [])
+        launches.append({"time": round(timer.launch_time)} | timer.marks)
+        del launches[:-LAUNCH_HISTORY_SIZE]
+
+    def get_launches(self, game_id: int) -> list[dict]:
+        return self._history.get(str(game_id), [])
+
+    def get_text(self, game_id: int) -> str:
+        # Average time until the game process was seen in previous launches
+        times = [
+            launch["first_child"]
+            for launch in self.get_launches(game_id)
+            if "first_child" in launch
+        ]
+        if not times:
+            return ""
+        return f"Usually {sum(times) / len(times):.1f}s"
+
+    def save(self) -> None:
+        temp_file = f"{self._history_file}.tmp"
+        try:
+            with open(temp_file, "w") as f:
+                json.dump(self._history, f)
+            replace(temp_file, self._history_file)
+        except OSError as e:
+            print(f"Launch history not saved: {e}")
@@ -2,44 +2,30 @@
 
 from __future__ import annotations
 
-from lutrisuiapp import LutrisUiApp
-from pygame import constants
+from sys import argv
+
+from lutrisuiapp import LutrisUiApp, get_controls_options
 from settings import Settings
-from uiwidgets import Controls
+from uiwidgets import Controls, InputRecorder, Tracer
+
+
+def get_argument(option: str) -> str | None:
+    if option in argv and argv.index(option) + 1 < len(argv):
+        return argv[argv.index(option) + 1]
+    return None
+
 
 if __name__ == "__main__":
-    ctr = Controls(
-        repeatable_commands=["UP", "DOWN", "LEFT", "RIGHT"],
-        keyboard_commands={
-            constants.K_UP: "UP",
-            constants.K_DOWN: "DOWN",
-            constants.K_LEFT: "LEFT",
-            constants.K_RIGHT: "RIGHT",
-            constants.K_RETURN: "ENTER",
-            constants.K_BACKSPACE: "BACK",
-            constants.K_ESCAPE: "EXIT",
-            constants.K_r: "RELOAD",
-        },
-        joypad_keys_commands={
-            constants.CONTROLLER_BUTTON_A: "ENTER",
-            constants.CONTROLLER_BUTTON_START: "ENTER",
-            constants.CONTROLLER_BUTTON_B: "BACK",
-            constants.CONTROLLER_BUTTON_BACK: "BACK",
-            constants.CONTROLLER_BUTTON_DPAD_UP: "UP",
-            constants.CONTROLLER_BUTTON_DPAD_DOWN: "DOWN",
-            constants.CONTROLLER_BUTTON_DPAD_LEFT: "LEFT",
-            constants.CONTROLLER_BUTTON_DPAD_RIGHT: "RIGHT",
-        },
-        allowed_event_types=[
-            constants.MOUSEBUTTONUP,
-            constants.MOUSEBUTTONDOWN,
-            constants.MOUSEMOTION,
-            constants.MOUSEWHEEL,
-            constants.WINDOWSIZECHANGED,
-            constants.WINDOWRESTORED,
-            constants.QUIT,
-        ],
-    )
+    trace_file = get_argument("--trace")
+    if trace_file is not None:
+        Tracer.enable(trace_file)
+    ctr = Controls(**get_controls_options())
+    record_file = get_argument("--record")
+    recorder = InputRecorder(record_file, ctr) if record_file is not None else None
     app = LutrisUiApp(ctr)
     app.run()
+    if recorder is not None:
+        recorder.close()
+    app.cover_cache.save()
     Settings.save()
+    Tracer.save()
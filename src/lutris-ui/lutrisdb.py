@@ -2,44 +2,252 @@ from __future__ import annotations
 
 import os
 import subprocess
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from math import log10
+from time import time
 
+from gamerecord import GameRecord
+from gamesearch import GameSearchIndex
+from launchhelper import LaunchHelper
+from launchtimes import LaunchHistory, LaunchTimer
 from lutris import settings
 from lutris.database import categories, games
 from settings import Settings
 from shutdown_handler import ShutdownManager
+from uiwidgets import Tracer
+
+LAUNCH_POLL_INTERVAL = 0.1  # s, process scan while waiting for the game
+
+
+# Jump buckets for sort attributes: first letter, month or playtime magnitude
+def _initial_bucket(text: str) -> str:
+    for char in text:
+        if char.isalpha():
+            return char.casefold()
+        if char.isdigit():
+            break
+    return "#"
+
+
+def _month_bucket(timestamp: int) -> int:
+    if not timestamp:
+        return 0
+    date = datetime.fromtimestamp(timestamp)
+    return date.year * 12 + date.month
+
+
+def _playtime_bucket(playtime: float) -> int:
+    if playtime < 1:
+        return 0
+    return int(log10(playtime)) + 1
 
 
 class LutrisDb:
+    SORT_ATTRIBUTES = {
+        "name": lambda game: game.name.casefold(),
+        "sortname": lambda game: (game.sortname or game.name).casefold(),
+        "lastplayed": lambda game: game.lastplayed,
+        "installed_at": lambda game: game.installed_at,
+        "playtime": lambda game: game.playtime,
+    }
+    SORT_BUCKETS = {
+        "name": lambda game: _initial_bucket(game.name),
+        "sortname": lambda game: _initial_bucket(game.sortname or game.name),
+        "lastplayed": lambda game: _month_bucket(game.lastplayed),
+        "installed_at": lambda game: _month_bucket(game.installed_at),
+        "playtime": lambda game: _playtime_bucket(game.playtime),
+    }
+
+    FACETS = ("runner", "platform", "category", "favorite")
+
     def __init__(self):
-        list_settings = Settings("gamelist")
-        self._sort_key: str = str(
-            list_settings.get("sort_attribute", "lastplayed")
-        )  # sortname, lastplayed, installed_at
-        self._sort_reverse: bool = bool(list_settings.get("reverse_sort", True))
+        self.list_settings = Settings("gamelist")
+        settings = Settings.get_snapshot()
+        self._sort_key = settings.gamelist.sort_attribute
+        self._sort_reverse = settings.gamelist.reverse_sort
         self.data_changed = True
-        self.games_data = [str, any]
-        self.shutdown_manager: ShutdownManager | None
+        self.order_changed = True
+        self.games_version = 0
+        self.games: list[GameRecord] = []
+        self.games_data: list[GameRecord] = []
+        self._sort_orders: dict[str, list[int]] = {}
+        self._sort_buckets: dict[str, list] = {}
+        self.jump_positions: list[int] = []
+        self.search_index: GameSearchIndex | None = None
+        self._search_query = ""
+        self._search_filter: set[int] | None = None
+        self._facets: dict[str, dict[str, set[int]]] = {}
+        self._facet_filters: dict[str, str] = {}
+        self._games_filter: set[int] | None = None
+        self.shutdown_manager: ShutdownManager | None = None
         self.terminate_in_proces = False
+        self.launch_timer: LaunchTimer | None = None
+        self.launch_history = LaunchHistory()
+        self._launch_poll_time: float = 0
+        self.launch_helper: LaunchHelper | None = None
+        if settings.play.launch_backend == "helper":
+            self.launch_helper = LaunchHelper(settings.play.launch_helper)
+            self.launch_helper.start()  # Import Lutris in background
 
-    def get_games(self) -> tuple[list, bool]:
-        if self.data_changed is False:
-            return self.games_data, False
-        self.games_data.clear()
+    @Tracer.traced("db")
+    def load_games(self) -> None:
+        self.games.clear()
+        self._facets = {facet: {} for facet in self.FACETS}
         for game_data in games.get_games(filters={"installed": "1"}):
             game_categories = categories.get_categories_in_game(game_data["id"])
             if ".hidden" in game_categories:
                 continue
-            data = game_data.copy()
-            data["coverart"] = self.get_cover_art(game_data)
-            self.games_data.append(data)
+            game = GameRecord(game_data, self.get_cover_art(game_data))
+            idx = len(self.games)
+            self.games.append(game)
+            self._add_to_facet("runner", game.runner, idx)
+            self._add_to_facet("platform", game.platform, idx)
+            for category in game_categories:
+                self._add_to_facet("category", category, idx)
+            if "favorite" in game_categories:
+                self._add_to_facet("favorite", "yes", idx)
 
-        # Note:  fallback "0" is for non-existing lastplayed value. This should not affect sorting by name
-        self.games_data.sort(
-            key=lambda game: game.get(self._sort_key) or 0, reverse=self._sort_reverse
+        # Precompute ascending order for each sort attribute. Ties are ordered by name
+        by_name = sorted(
+            range(len(self.games)), key=lambda idx: self.games[idx].name.casefold()
         )
+        self._sort_orders.clear()
+        self._sort_buckets.clear()
+        for sort_key, key_func in self.SORT_ATTRIBUTES.items():
+            self._sort_orders[sort_key] = sorted(
+                by_name, key=lambda idx: key_func(self.games[idx])
+            )
+        # Drop selections of values no longer present, like a removed runner
+        self._facet_filters = {
+            facet: value
+            for facet, value in self._facet_filters.items()
+            if value in self._facets[facet]
+        }
+        self.search_index = GameSearchIndex(self.games)
+        self._search_filter = self.search_index.search(self._search_query)
+        self._update_games_filter()
         self.data_changed = False
+        self.order_changed = True
+        self.games_version += 1
+
+    def get_games(self) -> tuple[list[GameRecord], bool]:
+        if self.data_changed is True:
+            self.load_games()
+        if self.order_changed is False:
+            return self.games_data, False
+
+        sort_order = self._sort_orders[self._sort_key]
+        if self._sort_reverse is True:
+            sort_order = reversed(sort_order)
+        games_filter = self._games_filter
+        if games_filter is not None:
+            sort_order = [idx for idx in sort_order if idx in games_filter]
+        else:
+            sort_order = list(sort_order)
+        self.games_data = [self.games[idx] for idx in sort_order]
+
+        # Positions in games_data where the jump bucket of current sort changes
+        buckets = self._sort_buckets.get(self._sort_key)
+        if buckets is None:
+            bucket_func = self.SORT_BUCKETS[self._sort_key]
+            buckets = [bucket_func(game) for game in self.games]
+            self._sort_buckets[self._sort_key] = buckets
+        self.jump_positions.clear()
+        last_bucket = None
+        for pos, idx in enumerate(sort_order):
+            if pos == 0 or buckets[idx] != last_bucket:
+                self.jump_positions.append(pos)
+                last_bucket = buckets[idx]
+
+        self.order_changed = False
         return self.games_data, True
 
+    def get_jump_position(self, position: int, forward: bool = True) -> int:
+        if not self.jump_positions:
+            return position
+        if forward is True:
+            next_idx = bisect_right(self.jump_positions, position)
+            if next_idx >= len(self.jump_positions):
+                return len(self.games_data) - 1
+            return self.jump_positions[next_idx]
+        prev_idx = bisect_left(self.jump_positions, position) - 1
+        if prev_idx < 0:
+            return 0
+        return self.jump_positions[prev_idx]
+
+    def get_sort(self) -> tuple[str, bool]:
+        return self._sort_key, self._sort_reverse
+
+    def set_sort(self, sort_key: str | None = None, reverse: bool | None = None):
+        if sort_key is not None and sort_key != self._sort_key:
+            if sort_key not in self.SORT_ATTRIBUTES:
+                raise ValueError(f"Unknown sort attribute {sort_key}")
+            self._sort_key = sort_key
+            self.list_settings.set("sort_attribute", sort_key)
+            self.order_changed = True
+        if reverse is not None and reverse != self._sort_reverse:
+            self._sort_reverse = reverse
+            self.list_settings.set("reverse_sort", reverse)
+            self.order_changed = True
+
+    def get_search(self) -> str:
+        return self._search_query
+
+    def set_search(self, query: str) -> None:
+        if query == self._search_query:
+            return
+        self._search_query = query
+        if self.search_index is not None:
+            self._search_filter = self.search_index.search(query)
+            self._update_games_filter()
+
+    def _add_to_facet(self, facet: str, value: str, idx: int) -> None:
+        if not value:
+            return
+        facet_values = self._facets[facet]
+        if value in facet_values:
+            facet_values[value].add(idx)
+        else:
+            facet_values[value] = {idx}
+
+    def get_facet_values(self, facet: str) -> list[str]:
+        return sorted(self._facets.get(facet, {}), key=str.casefold)
+
+    def get_facet(self, facet: str) -> str | None:
+        return self._facet_filters.get(facet)
+
+    def set_facet(self, facet: str, value: str | None) -> None:
+        if facet not in self.FACETS:
+            raise ValueError(f"Unknown facet {facet}")
+        if value == self._facet_filters.get(facet):
+            return
+        if value is None:
+            del self._facet_filters[facet]
+        else:
+            self._facet_filters[facet] = value
+        self._update_games_filter()
+
+    def _update_games_filter(self) -> None:
+        # Intersect search result and all facet selections, smallest set first
+        filters = [
+            self._facets.get(facet, {}).get(value, set())
+            for facet, value in self._facet_filters.items()
+        ]
+        if self._search_filter is not None:
+            filters.append(self._search_filter)
+        if filters:
+            filters.sort(key=len)
+            self._games_filter = filters[0].intersection(*filters[1:])
+        else:
+            self._games_filter = None
+        self.order_changed = True
+
+    def switch_sort(self) -> None:
+        sort_keys = list(self.SORT_ATTRIBUTES)
+        next_idx = (sort_keys.index(self._sort_key) + 1) % len(sort_keys)
+        self.set_sort(sort_key=sort_keys[next_idx])
+
     @staticmethod
     def get_cover_art(game: dict) -> str | None:
         image_path = os.path.join(settings.COVERART_PATH, f"{game['slug']}.jpg")
@@ -49,29 +257,75 @@ class LutrisDb:
         if os.path.exists(image_path):
             return image_path
 
-    def launch(self, game_data: dict) -> None:
+    @staticmethod
+    def get_game_data(game: GameRecord) -> dict:
+        return games.get_game_by_field(game.id, "id") or {}
+
+    def launch(self, game: GameRecord, start_time: float | None = None) -> None:
+        # start_time is the time the launch input was read
+        launch_timer = LaunchTimer(game.id, start_time or time())
+        launch_timer.mark("input")
+        game_data = self.get_game_data(game)
+        if not game_data:
+            print(f"Game {game.name} not found in Lutris database")
+            self.shutdown_manager = None
+            self.launch_timer = None
+            return
         print(f"Launch Lutris session for {game_data['name']}")
-        p = subprocess.Popen(
-            [
-                "env",
-                "LUTRIS_SKIP_INIT=1",
-                "lutris",
-                f"lutris:rungameid/{game_data['id']}",
-            ],
-            start_new_session=True,
-        )
-        self.shutdown_manager = ShutdownManager(p.pid)
+        pid = None
+        if self.launch_helper is not None:
+            pid = self.launch_helper.launch(game_data["id"])
+        if pid is None:
+            p = subprocess.Popen(
+                [
+                    "env",
+                    "LUTRIS_SKIP_INIT=1",
+                    "lutris",
+                    f"lutris:rungameid/{game_data['id']}",
+                ],
+                start_new_session=True,
+            )
+            pid = p.pid
+        launch_timer.mark("popen")
+        self.launch_timer = launch_timer
+        self._launch_poll_time = 0
+        self.shutdown_manager = ShutdownManager(pid)
         self.terminate_in_proces = False
 
     def check_is_running(self, kill_in_progress: bool = False) -> bool:
         if self.shutdown_manager is None:
             return False
 
+        self._update_launch_timer()
         is_running = self.shutdown_manager.check_is_running(check_all=kill_in_progress)
         if is_running is False:
             self.shutdown_manager = None
+            if self.launch_timer is not None:
+                self.launch_timer.mark("exit")
+                self.launch_history.add(self.launch_timer)
+                self.launch_history.save()
         return is_running
 
+    def _update_launch_timer(self) -> None:
+        # The LaunchModule answers first while Lutris runs, so look for the wrapper
+        # and the game process here until the game is started
+        launch_timer = self.launch_timer
+        if launch_timer is None or launch_timer.is_starting() is False:
+            return
+        now = time()
+        if now - self._launch_poll_time < LAUNCH_POLL_INTERVAL:
+            return
+        self._launch_poll_time = now
+        assert self.shutdown_manager
+        lutris_module = self.shutdown_manager.lutris_module
+        if launch_timer.has("wrapper") is False:
+            lutris_module.check_is_running()
+            if lutris_module.pid is None:
+                return
+            launch_timer.mark("wrapper")
+        if lutris_module.get_game_pid() is not None:
+            launch_timer.mark("first_child")
+
     def kill_running(self) -> None:
         if self.shutdown_manager:
             self.shutdown_manager.shutdown_game()
@@ -1,57 +1,158 @@
 from __future__ import annotations
 
 from sys import argv
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, cast
 
+from configwatcher import ConfigWatcher
+from covercache import CoverCache
 from lutrisdb import LutrisDb
 from pygame import constants, display, event, image
 from settings import Settings
-from uigamelist import UiGameListWidget
-from uirunninggame import UiGameIsRunningWidget
-from uiwidgets import UiApp
+from uifilter import UiFilterWidget
+from uigamelist import TileGeometry, UiGameListWidget, UiGameViewport
+from uirunninggame import LAUNCH_POLL_EVENT, UiGameIsRunningWidget
+from uisearch import UiSearchWidget
+from uiwidgets import Controls, SurfacePool, UiApp
 
 if TYPE_CHECKING:
-    from uiwidgets import Controls
+    from gamerecord import GameRecord
+    from settings import SettingsSnapshot
+
+
+def get_controls_options() -> dict:
+    # Controls parameters of Lutris-UI
+    return dict(
+        repeatable_commands=[
+            "UP",
+            "DOWN",
+            "LEFT",
+            "RIGHT",
+            "PAGE_UP",
+            "PAGE_DOWN",
+            "JUMP_PREV",
+            "JUMP_NEXT",
+        ],
+        keyboard_commands={
+            constants.K_UP: "UP",
+            constants.K_DOWN: "DOWN",
+            constants.K_LEFT: "LEFT",
+            constants.K_RIGHT: "RIGHT",
+            constants.K_PAGEUP: "PAGE_UP",
+            constants.K_PAGEDOWN: "PAGE_DOWN",
+            constants.K_HOME: "TOP",
+            constants.K_END: "BOTTOM",
+            constants.K_p: "JUMP_PREV",
+            constants.K_n: "JUMP_NEXT",
+            constants.K_RETURN: "ENTER",
+            constants.K_BACKSPACE: "BACK",
+            constants.K_ESCAPE: "EXIT",
+            constants.K_r: "RELOAD",
+            constants.K_s: "SORT",
+            constants.K_o: "SORT_REVERSE",
+            constants.K_f: "SEARCH",
+            constants.K_c: "FILTER",
+            constants.K_PLUS: "ZOOM_IN",
+            constants.K_EQUALS: "ZOOM_IN",
+            constants.K_KP_PLUS: "ZOOM_IN",
+            constants.K_MINUS: "ZOOM_OUT",
+            constants.K_KP_MINUS: "ZOOM_OUT",
+            constants.K_F12: "PROFILER",
+        },
+        joypad_keys_commands={
+            constants.CONTROLLER_BUTTON_A: "ENTER",
+            constants.CONTROLLER_BUTTON_START: "ENTER",
+            constants.CONTROLLER_BUTTON_B: "BACK",
+            constants.CONTROLLER_BUTTON_BACK: "BACK",
+            constants.CONTROLLER_BUTTON_X: "SEARCH",
+            constants.CONTROLLER_BUTTON_Y: "SORT",
+            constants.CONTROLLER_BUTTON_RIGHTSTICK: "SORT_REVERSE",
+            constants.CONTROLLER_BUTTON_LEFTSTICK: "FILTER",
+            constants.CONTROLLER_BUTTON_LEFTSHOULDER: "JUMP_PREV",
+            constants.CONTROLLER_BUTTON_RIGHTSHOULDER: "JUMP_NEXT",
+            constants.CONTROLLER_BUTTON_DPAD_UP: "UP",
+            constants.CONTROLLER_BUTTON_DPAD_DOWN: "DOWN",
+            constants.CONTROLLER_BUTTON_DPAD_LEFT: "LEFT",
+            constants.CONTROLLER_BUTTON_DPAD_RIGHT: "RIGHT",
+        },
+        allowed_event_types=[
+            constants.MOUSEBUTTONUP,
+            constants.MOUSEBUTTONDOWN,
+            constants.MOUSEMOTION,
+            constants.MOUSEWHEEL,
+            constants.TEXTINPUT,
+            constants.WINDOWSIZECHANGED,
+            constants.WINDOWRESTORED,
+            constants.QUIT,
+            LAUNCH_POLL_EVENT,
+        ],
+    )
 
 
 class LutrisUiApp(UiApp):
     def __init__(self, controls: Controls):
-        self.settings = Settings("window")
-
+        window_settings = Settings.get_snapshot().window
+        fullscreen = window_settings.fullscreen
         if "--fullscreen" in argv or "-f" in argv:
             fullscreen = True
-        else:
-            fullscreen = self.settings.get("fullscreen", False)
-        assert isinstance(fullscreen, bool)
-
+        noframe = window_settings.noframe
         if "--noframe" in argv or "-n" in argv:
             noframe = True
-        else:
-            noframe = self.settings.get("noframe", False)
-        assert isinstance(noframe, bool)
 
-        size_w = self.settings.get("size_w", 0)
-        size_h = self.settings.get("size_h", 0)
-        assert isinstance(size_w, int) and isinstance(size_h, int)
         super().__init__(
             controls=controls,
-            size_w=size_w,
-            size_h=size_h,
+            size_w=window_settings.size_w,
+            size_h=window_settings.size_h,
             fullscreen=fullscreen,
             noframe=noframe,
         )
         display.set_caption("Lutris-UI")
-        icon_path: str = self.settings.get_ressource_path("lutris-ui.png")
+        icon_path = Settings.get_ressource_path("lutris-ui.png")
         display.set_icon(image.load(icon_path))
         self.ldb = LutrisDb()
+        self.cover_cache = CoverCache()
         self.games_viewport = UiGameListWidget(self, border_all=10, border_color="Grey")
+        self.search_widget = UiSearchWidget(self)
+        self.filter_widget = UiFilterWidget(self)
         self.game_is_running = UiGameIsRunningWidget(
             self, border_all=10, border_color="Grey"
         )
-        self._hide_on_launch = Settings("play").get("hide_on_launch", False)
-        assert isinstance(self._hide_on_launch, bool)
+        Settings.add_listener(self.apply_settings)
+        self.config_watcher = ConfigWatcher(self.post_settings_changed)
+        self.config_watcher.start()
+
+    @staticmethod
+    def post_settings_changed() -> None:
+        # Called by the watcher thread. Reload in main loop
+        if display.get_init() is True:
+            event.post(
+                event.Event(
+                    Controls.COMMAND_EVENT, command="SETTINGS_CHANGED", origin=None
+                )
+            )
+
+    def apply_settings(
+        self, old_settings: SettingsSnapshot, new_settings: SettingsSnapshot
+    ) -> None:
+        self.cover_cache.max_covers = new_settings.game_widget.cover_cache_size
+        viewport = cast(UiGameViewport, self.games_viewport.viewport_widget)
+        viewport.smooth_scroll = new_settings.gamelist.smooth_scroll
+        game_widget_settings = new_settings.game_widget
+        viewport.set_geometry(
+            TileGeometry(game_widget_settings, game_widget_settings.zoom)
+        )
+        if new_settings.gamelist != old_settings.gamelist:
+            self.ldb.set_sort(
+                new_settings.gamelist.sort_attribute,
+                new_settings.gamelist.reverse_sort,
+            )
+            if self.ldb.order_changed is True:
+                viewport.update_games_list()
+                viewport.select_game("TOP")
 
     def process_event_focus(self, event: event.Event) -> bool:
+        if event.type == Controls.COMMAND_EVENT and event.command == "SETTINGS_CHANGED":
+            Settings.reload()
+            return True
         if (
             event.type == constants.KEYDOWN
             and event.key == constants.K_RETURN
@@ -85,16 +186,29 @@ class LutrisUiApp(UiApp):
             return True
         return super().process_event_focus(event)
 
-    def launch(self, game_data) -> None:
-        self.ldb.launch(game_data)
+    def launch(self, game_data: GameRecord) -> None:
+        self.ldb.launch(game_data, self.controls.events_time)
         self.games_viewport.set_interactive(False)
         self.game_is_running.set_running(game_data)
-        if self._hide_on_launch is True:
+        # Suspend the games list behind the fog snapshot until launch_completed()
+        viewport = self.games_viewport.viewport_widget
+        assert viewport
+        viewport.stop_scrolling()
+        viewport.set_process_tick_enabled(False)
+        self.cover_cache.cancel_prefetch()
+        self.games_viewport.set_visible(False)
+        # Leave the memory to the game. Covers are restored from atlas file
+        self.games_viewport.release_surfaces()
+        play_settings = Settings.get_snapshot().play
+        self.cover_cache.trim(play_settings.running_cover_cache_size)
+        SurfacePool.clear()
+        if play_settings.hide_on_launch is True:
             display.iconify()
 
     def launch_completed(self) -> None:
         self.ldb.data_changed = True
         self.game_is_running.set_visible(False)
-        if self._hide_on_launch is True:
+        self.games_viewport.set_visible()
+        if Settings.get_snapshot().play.hide_on_launch is True:
             self.init_display_settings()
         self.games_viewport.set_focus()
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from configparser import ConfigParser
 from os import makedirs, path, sep
-from typing import TypeVar
+from typing import Callable, TypeVar
 
 from xdg import BaseDirectory
 
@@ -13,9 +13,159 @@ _app_name = "lutris-ui"
 _AnySetting = TypeVar("_AnySetting", str, int, float, bool)
 
 
+def _parse_value(config: ConfigParser, module: str, key: str, default_value):
+    if config.has_option(module, key) is False:
+        return default_value
+    try:
+        if type(default_value) is bool:
+            return config.getboolean(module, key)
+        return type(default_value)(config.get(module, key))
+    except ValueError:
+        print(f"Invalid value for {key} in [{module}], using {default_value}")
+        return default_value
+
+
+# Read-only settings of a config section. The keys, types and defaults are declared
+# in SCHEMA, the values are parsed once from the config
+class SettingsSection:
+    __slots__ = ()
+    MODULE = ""
+    SCHEMA: dict[str, str | int | float | bool] = {}
+    CHOICES: dict[str, tuple[str, ...]] = {}
+
+    def __init__(self, config: ConfigParser):
+        for key, default_value in self.SCHEMA.items():
+            value = _parse_value(config, self.MODULE, key, default_value)
+            choices = self.CHOICES.get(key)
+            if choices is not None and value not in choices:
+                print(
+                    f"Invalid value for {key} in [{self.MODULE}], using {default_value}"
+                )
+                value = default_value
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, key: str, value) -> None:
+        raise AttributeError(f"Settings [{self.MODULE}] are read-only")
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, key) == getattr(other, key) for key in self.SCHEMA)
+
+
+class GameWidgetSettings(SettingsSection):
+    MODULE = "game_widget"
+    SCHEMA = {
+        "width": 240,
+        "distance_width": 10,
+        "distance_height": 10,
+        "label_height": 65,
+        "zoom": 1.0,
+        "cover_cache_size": 200,
+        "cover_atlas": True,
+    }
+    __slots__ = tuple(SCHEMA)
+    width: int
+    distance_width: int
+    distance_height: int
+    label_height: int
+    zoom: float
+    cover_cache_size: int
+    cover_atlas: bool
+
+
+class GameListSettings(SettingsSection):
+    MODULE = "gamelist"
+    SCHEMA = {
+        "sort_attribute": "lastplayed",
+        "reverse_sort": True,
+        "smooth_scroll": True,
+    }
+    CHOICES = {
+        "sort_attribute": ("name", "sortname", "lastplayed", "installed_at", "playtime")
+    }
+    __slots__ = tuple(SCHEMA)
+    sort_attribute: str
+    reverse_sort: bool
+    smooth_scroll: bool
+
+
+class PlaySettings(SettingsSection):
+    MODULE = "play"
+    SCHEMA = {
+        "hide_on_launch": False,
+        "running_cover_cache_size": 30,
+        "launch_backend": "subprocess",
+        "launch_helper": "",
+    }
+    CHOICES = {"launch_backend": ("subprocess", "helper")}
+    __slots__ = tuple(SCHEMA)
+    hide_on_launch: bool
+    running_cover_cache_size: int
+    launch_backend: str
+    launch_helper: str
+
+
+class InputSettings(SettingsSection):
+    MODULE = "input"
+    SCHEMA = {
+        "repeat_time_1": 500.0,
+        "repeat_time_2": 200.0,
+        "stick_max_rate": 60.0,
+    }
+    __slots__ = tuple(SCHEMA)
+    repeat_time_1: float
+    repeat_time_2: float
+    stick_max_rate: float
+
+
+class WindowSettings(SettingsSection):
+    MODULE = "window"
+    SCHEMA = {
+        "fullscreen": False,
+        "noframe": False,
+        "size_w": 0,
+        "size_h": 0,
+    }
+    __slots__ = tuple(SCHEMA)
+    fullscreen: bool
+    noframe: bool
+    size_w: int
+    size_h: int
+
+
+# All declared sections. The [keyboard] and [joypad] mappings have free keys and are
+# read by get_options()
+class SettingsSnapshot:
+    SECTIONS: dict[str, type[SettingsSection]] = {
+        "game_widget": GameWidgetSettings,
+        "gamelist": GameListSettings,
+        "play": PlaySettings,
+        "input": InputSettings,
+        "window": WindowSettings,
+    }
+    __slots__ = tuple(SECTIONS)
+    game_widget: GameWidgetSettings
+    gamelist: GameListSettings
+    play: PlaySettings
+    input: InputSettings
+    window: WindowSettings
+
+    def __init__(self, config: ConfigParser):
+        for name, section in self.SECTIONS.items():
+            object.__setattr__(self, name, section(config))
+
+    def __setattr__(self, key: str, value) -> None:
+        raise AttributeError("Settings snapshot is read-only")
+
+
 class Settings:
     config: ConfigParser | None = None
     config_changed = False
+    _snapshot: SettingsSnapshot | None = None
+    # Not saved set() values by (module, key): value in the file before, new value
+    _pending: dict[tuple[str, str], tuple[str | None, str]] = {}
+    _listeners: list[Callable[[SettingsSnapshot, SettingsSnapshot], None]] = []
 
     def __init__(self, module: str):
         self.module = module
@@ -31,6 +181,47 @@ class Settings:
             if path.isfile(config_file):
                 Settings.config.read(config_file)
 
+    @staticmethod
+    def get_config_files() -> list[str]:
+        # Possible config files, also not existing. User config first
+        return [
+            path.join(config_dir, _app_name, "config.ini")
+            for config_dir in BaseDirectory.xdg_config_dirs
+        ]
+
+    @staticmethod
+    def get_snapshot() -> SettingsSnapshot:
+        if Settings._snapshot is None:
+            Settings.open_config()
+            assert Settings.config
+            Settings._snapshot = SettingsSnapshot(Settings.config)
+        return Settings._snapshot
+
+    @staticmethod
+    def add_listener(
+        listener: Callable[[SettingsSnapshot, SettingsSnapshot], None]
+    ) -> None:
+        # Called with old and new snapshot after reload()
+        Settings._listeners.append(listener)
+
+    @staticmethod
+    def reload() -> None:
+        old_snapshot = Settings.get_snapshot()
+        pending = Settings._pending
+        Settings._pending = {}
+        Settings.config = None
+        Settings._snapshot = None
+        Settings.config_changed = False
+        Settings.open_config()
+        assert Settings.config
+        # Keep the not saved values, except the file changed them too
+        for (module, key), (file_value, value) in pending.items():
+            if Settings.config.get(module, key, fallback=None) == file_value:
+                Settings(module).set(key, value)
+        new_snapshot = Settings.get_snapshot()
+        for listener in Settings._listeners:
+            listener(old_snapshot, new_snapshot)
+
     def set_default_value(self, key: str, value) -> None:
         if SAVE_DEFAULTS is False:
             return
@@ -59,6 +250,15 @@ class Settings:
         return_type = type(default_value)
         return return_type(value)
 
+    def get_options(self) -> dict[str, str]:
+        # All options in module section
+        self.open_config()
+        assert Settings.config
+
+        if Settings.config.has_section(self.module) is False:
+            return {}
+        return dict(Settings.config.items(self.module))
+
     def get_str(self, key: str) -> str | None:
         assert Settings.config
         value = Settings.config.get(self.module, key)
@@ -81,10 +281,17 @@ class Settings:
         self.open_config()
         assert Settings.config
 
+        option = (self.module, key)
+        if option in Settings._pending:
+            file_value = Settings._pending[option][0]
+        else:
+            file_value = Settings.config.get(self.module, key, fallback=None)
+        Settings._pending[option] = (file_value, str(value))
         if Settings.config.has_section(self.module) is False:
             Settings.config.add_section(self.module)
         Settings.config.set(self.module, key, str(value))
         Settings.config_changed = True
+        Settings._snapshot = None
 
     @staticmethod
     def save() -> None:
@@ -99,6 +306,16 @@ class Settings:
         with open(path.join(config_path, "config.ini"), "w") as f:
             Settings.config.write(f)
             f.close()
+        Settings.config_changed = False
+        Settings._pending.clear()
+
+    @staticmethod
+    def get_cache_path(file_name: str) -> str:
+        return path.join(BaseDirectory.save_cache_path(_app_name), file_name)
+
+    @staticmethod
+    def get_data_path(file_name: str) -> str:
+        return path.join(BaseDirectory.save_data_path(_app_name), file_name)
 
     @staticmethod
     def get_ressource_path(file_name: str) -> str:
@@ -5,6 +5,7 @@ from os import X_OK, access, getuid, path
 from subprocess import run
 
 import psutil
+from uiwidgets import Tracer
 
 
 class BaseModule:
@@ -28,6 +29,7 @@ class BaseModule:
         self.pid: int | None = None
         self.shutdown_sent_time: datetime = self._zero_datetime
 
+    @Tracer.traced("shutdown")
     def check_is_running(self) -> bool:
         # Check the launched command is still running
         if self.pid:
@@ -47,6 +49,7 @@ class BaseModule:
                 return False
         return False
 
+    @Tracer.traced("shutdown")
     def shutdown(self, root_pid: int) -> bool:
         return False
 
@@ -57,6 +60,7 @@ class LaunchModule(BaseModule):
         self.pid = pid
         self.launch_time = datetime.now()
 
+    @Tracer.traced("shutdown")
     def check_is_running(self) -> bool:
         is_running = super().check_is_running()
         if is_running is True:
@@ -70,6 +74,7 @@ class LaunchModule(BaseModule):
 
 
 class LutrisModule(BaseModule):
+    @Tracer.traced("shutdown")
     def check_is_running(self) -> bool:
         if self.pid is None:
             # Search for pid in running processes
@@ -86,8 +91,19 @@ class LutrisModule(BaseModule):
                     self.pid = process.pid
         return super().check_is_running()
 
+    def get_game_pid(self) -> int | None:
+        # First process started by the wrapper
+        if self.pid is None:
+            return None
+        try:
+            children = psutil.Process(self.pid).children()
+        except psutil.NoSuchProcess:
+            return None
+        return children[0].pid if children else None
+
 
 class AnyModule(BaseModule):
+    @Tracer.traced("shutdown")
     def shutdown(self, root_pid: int) -> bool:
         if root_pid is None:
             return False
@@ -110,6 +126,7 @@ class AnyModule(BaseModule):
 
 
 class SteamModule(BaseModule):
+    @Tracer.traced("shutdown")
     def shutdown(self, root_pid: int) -> bool:
         if root_pid is None:
             return False
@@ -159,6 +176,7 @@ class WineModule(BaseModule):
                     if path.isfile(wineboot) and access(wineboot, X_OK):
                         self.wineboot = wineboot
 
+    @Tracer.traced("shutdown")
     def shutdown(self, root_pid: int) -> bool:
         if root_pid is None:
             return False
@@ -203,6 +221,7 @@ class ShutdownManager:
         self.shutdown_modules.append(SteamModule())
         self.shutdown_modules.append(WineModule())
 
+    @Tracer.traced("shutdown")
     def check_is_running(self, check_all: bool = False) -> bool:
         is_running_all = False
         for module in self.shutdown_modules:
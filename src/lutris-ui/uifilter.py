@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, cast
+
+from pygame import Color
+from uiwidgets import Controls, DynamicTypes, UiWidgetTextBlock
+
+if TYPE_CHECKING:
+    from lutrisuiapp import LutrisUiApp
+    from pygame import event
+    from uigamelist import UiGameViewport
+    from uiwidgets import UiWidget
+
+FACET_TITLES = {
+    "runner": "Runner",
+    "platform": "Platform",
+    "category": "Category",
+    "favorite": "Favorites",
+}
+
+
+class UiFilterWidget(UiWidgetTextBlock):
+    def __init__(self, parent: UiWidget, **kwargs):
+        super().__init__(
+            parent,
+            bg_color=Color("White"),
+            border_color=Color(128, 128, 255),
+            border_all=5,
+            text_centered_x=True,
+            text_centered_y=True,
+            pos_x_type=DynamicTypes.TYPE_CENTER,
+            pos_y=20,
+            size_w_type=DynamicTypes.TYPE_PERCENT,
+            size_w=60,
+            size_h=150,
+            **kwargs,
+        )
+        self.is_visible = False
+        self.ldb = cast("LutrisUiApp", self.get_root_widget()).ldb
+        self.selected_facet = 0
+
+    def get_games_viewport(self) -> UiGameViewport:
+        app = cast("LutrisUiApp", self.get_root_widget())
+        return cast("UiGameViewport", app.games_viewport.viewport_widget)
+
+    def open(self) -> None:
+        self.set_visible()
+        self.set_focus()
+        self.update_text()
+
+    def close(self, keep_filter: bool = True) -> None:
+        if keep_filter is False:
+            for facet in self.ldb.FACETS:
+                self.get_games_viewport().set_facet(facet, None)
+        app = cast("LutrisUiApp", self.get_root_widget())
+        app.games_viewport.set_focus()
+        self.get_games_viewport().select_game("TOP")
+
+    def switch_value(self, step: int) -> None:
+        facet = self.ldb.FACETS[self.selected_facet]
+        values: list[str | None] = [None]
+        values += self.ldb.get_facet_values(facet)
+        value_idx = values.index(self.ldb.get_facet(facet)) + step
+        self.get_games_viewport().set_facet(facet, values[value_idx % len(values)])
+        self.update_text()
+
+    def update_text(self) -> None:
+        lines = []
+        for idx, facet in enumerate(self.ldb.FACETS):
+            marker = ">" if idx == self.selected_facet else " "
+            value = self.ldb.get_facet(facet) or "All"
+            lines.append(f"{marker} {FACET_TITLES[facet]}: {value}")
+        games_count = len(self.get_games_viewport().game_widgets)
+        lines.append(f"({games_count})")
+        self.text = "\n".join(lines)
+        self.set_changed()
+
+    def set_focus(self, focus: bool = True) -> None:
+        super().set_focus(focus)
+        if focus is False and self.is_visible is True:
+            self.set_visible(False)
+
+    def process_event_focus(self, event: event.Event) -> bool:
+        if event.type != Controls.COMMAND_EVENT:
+            return False
+        match event.command:
+            case "UP":
+                self.selected_facet = (self.selected_facet - 1) % len(self.ldb.FACETS)
+                self.update_text()
+            case "DOWN":
+                self.selected_facet = (self.selected_facet + 1) % len(self.ldb.FACETS)
+                self.update_text()
+            case "LEFT":
+                self.switch_value(-1)
+            case "RIGHT":
+                self.switch_value(1)
+            case "ENTER" | "FILTER":
+                self.close()
+            case "BACK" | "EXIT":
+                self.close(keep_filter=False)
+            case _:
+                return False
+        return True
@@ -2,36 +2,81 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, cast
 
-from pygame import Color, constants, draw, event, image, transform
+from pygame import Color, constants, draw, event
 from settings import Settings
 from uiwidgets import (Controls, DynamicTypes, UiWidgetStatic,
                        UiWidgetTextBlock, UiWidgetViewport,
                        UiWidgetViewportContainer)
 
 if TYPE_CHECKING:
+    from gamerecord import GameRecord
     from lutrisuiapp import LutrisUiApp
     from pygame import Surface
+    from settings import GameWidgetSettings
     from uiwidgets import UiWidget
 
 
-game_list_settings = Settings("game_widget")
-GAME_WIDGET_WIDTH: int = game_list_settings.get("width", 240)
-GAME_WIDGET_HEIGHT = int(GAME_WIDGET_WIDTH * 1.4)
-GAME_DISTANCE_WIDTH: int = game_list_settings.get("distance_width", 10)
-GAME_DISTANCE_HEIGHT: int = game_list_settings.get("distance_height", 10)
-TEXT_AREA_HEIGHT: int = game_list_settings.get("label_height", 65)
+GAME_BORDER_WIDTH = 10
+GAME_FOCUS_BORDER_WIDTH = 5
+ZOOM_LEVELS = (0.5, 0.625, 0.75, 0.875, 1.0, 1.25, 1.5, 1.75, 2.0)
+PREFETCH_ROWS = 2  # Minimum rows to prefetch covers in scroll direction
+PREFETCH_TIME = 0.5  # s, flick distance to prefetch covers for
+
+
+# Tile sizes of the game grid for the [game_widget] settings and a zoom level
+class TileGeometry:
+    __slots__ = (
+        "zoom",
+        "width",
+        "height",
+        "distance_width",
+        "distance_height",
+        "label_height",
+        "base_cover_size",
+    )
+
+    def __init__(self, settings: GameWidgetSettings, zoom: float = 1.0):
+        self.zoom = min(max(zoom, ZOOM_LEVELS[0]), ZOOM_LEVELS[-1])
+        self.width = round(settings.width * self.zoom)
+        self.height = int(self.width * 1.4)
+        self.distance_width = settings.distance_width
+        self.distance_height = settings.distance_height
+        self.label_height = settings.label_height
+        # Cover size of not zoomed tiles, kept in the cover atlas
+        self.base_cover_size = (
+            settings.width - 2 * GAME_BORDER_WIDTH,
+            int(settings.width * 1.4) - 2 * GAME_BORDER_WIDTH,
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TileGeometry):
+            return NotImplemented
+        return all(getattr(self, key) == getattr(other, key) for key in self.__slots__)
+
+    def get_row_height(self) -> int:
+        return self.height + self.distance_height
 
 
 class UiGameWidget(UiWidgetStatic):
-    def __init__(self, parent: UiWidget, game_data: dict | None = None, **kwargs):
+    def __init__(
+        self,
+        parent: UiWidget,
+        game_data: GameRecord | None = None,
+        geometry: TileGeometry | None = None,
+        **kwargs,
+    ):
         super().__init__(parent, **kwargs)
-        self.set_size(size_w=GAME_WIDGET_WIDTH, size_h=GAME_WIDGET_HEIGHT)
-        self.set_border(border_all=10, border_color=Color("White"))
+        if geometry is None:
+            geometry = TileGeometry(Settings.get_snapshot().game_widget)
+        self.geometry = geometry
+        self.set_size(size_w=geometry.width, size_h=geometry.height)
+        self.set_border(border_all=GAME_BORDER_WIDTH, border_color=Color("White"))
         self.name: str
-        self.data: dict
+        self.data: GameRecord
+        self.list_index = 0  # Position in UiGameViewport.game_widgets
         if game_data:
-            self.name: str = game_data["name"]
-            self.data: dict = game_data
+            self.name: str = game_data.name
+            self.data: GameRecord = game_data
         self.label_widget = UiWidgetTextBlock(
             parent=self,
             bg_color=Color(255, 255, 255, 100),
@@ -41,9 +86,16 @@ class UiGameWidget(UiWidgetStatic):
             text_centered_y=True,
             pos_x_type=DynamicTypes.TYPE_CENTER,
             pos_y_type=DynamicTypes.TYPE_PIXEL_REVERSE,
-            size_h=TEXT_AREA_HEIGHT,
+            size_h=geometry.label_height,
         )
 
+    def set_geometry(self, geometry: TileGeometry) -> None:
+        # Resized surfaces are created on next draw, so only for visible tiles
+        self.geometry = geometry
+        self.set_size(size_w=geometry.width, size_h=geometry.height)
+        self.label_widget.set_size(size_h=geometry.label_height)
+        self.release_surfaces()
+
     def compose(self, surface: Surface) -> None:
         assert self.data
         max_w = surface.get_width()
@@ -54,24 +106,15 @@ class UiGameWidget(UiWidgetStatic):
         else:
             surface.fill((255, 255, 255))
 
-        coverart = self.data.get("coverart")
+        coverart = self.data.coverart
         if coverart is None:
             draw.rect(surface, (128, 255, 255), (0, 0, max_w, max_h))
         else:
-            img = image.load(coverart)
-            orig_h = img.get_height()
-            orig_w = img.get_width()
-
-            # Print Image
-            if orig_h > orig_w * 1.4:
-                zoom_factor = max_h / orig_h
-            else:
-                zoom_factor = max_w / orig_w
-
-            resized = transform.scale_by(img, zoom_factor)
-            img_pos_x = (max_w - resized.get_width()) / 2
-            img_pos_y = (max_h - resized.get_height()) / 2
-            surface.blit(resized, (img_pos_x, img_pos_y))
+            app = cast("LutrisUiApp", self.get_root_widget())
+            cover = app.cover_cache.get_cover(coverart, (max_w, max_h))
+            img_pos_x = (max_w - cover.get_width()) / 2
+            img_pos_y = (max_h - cover.get_height()) / 2
+            surface.blit(cover, (img_pos_x, img_pos_y))
 
         if self.label_widget.text != self.name:
             self.label_widget.text = self.name
@@ -105,9 +148,11 @@ class UiGameWidget(UiWidgetStatic):
             return
         super().set_focus(focus)
         if focus is True:
-            self.set_border(border_color=Color(128, 128, 255), border_all=5)
+            self.set_border(
+                border_color=Color(128, 128, 255), border_all=GAME_FOCUS_BORDER_WIDTH
+            )
         else:
-            self.set_border(border_color=Color("White"), border_all=10)
+            self.set_border(border_color=Color("White"), border_all=GAME_BORDER_WIDTH)
         self.set_changed()
 
 
@@ -115,26 +160,73 @@ class UiGameViewport(UiWidgetViewport):
     def __init__(self, parent: UiWidget, **kwargs):
         super().__init__(parent, **kwargs)
         self.max_games_cols = 0
-        self.game_widgets = []
+        self.overlapping_children = False  # Tiles in grid
+        self.game_widgets: list[UiGameWidget] = []
+        self.game_widgets_by_id: dict[int, UiGameWidget] = {}
         app = self.get_root_widget()
         self.ldb = cast("LutrisUiApp", app).ldb
         self._old_width = 0
+        self._games_version = 0
+        self.smooth_scroll = Settings.get_snapshot().gamelist.smooth_scroll
+        self._prefetch_shift_y = 0
+        self._prefetch_rows: tuple[int, int] | None = None
+        settings = Settings.get_snapshot().game_widget
+        self.geometry = TileGeometry(settings, settings.zoom)
+        self._layout_geometry: TileGeometry | None = None
+        self._focus_offset: int | None = None  # Focused tile y on screen to keep
+        cast("LutrisUiApp", app).cover_cache.set_atlas_size(
+            self.geometry.base_cover_size
+        )
+
+    def set_geometry(self, geometry: TileGeometry) -> None:
+        # Tiles are moved and resized on next draw, the focused tile keeps its row
+        if geometry == self.geometry:
+            return
+        if self.focus_child is not None and self._focus_offset is None:
+            self._focus_offset = self.focus_child.get_rect().y - self.shift_y
+        self.geometry = geometry
+        cast("LutrisUiApp", self.get_root_widget()).cover_cache.set_atlas_size(
+            geometry.base_cover_size
+        )
+        self.stop_scrolling()
+        self._prefetch_rows = None
+        self.set_changed()
+
+    def release_surfaces(self) -> None:
+        super().release_surfaces()
+        # Tiles hidden by the search or a filter are not in the children
+        for widget in self.game_widgets_by_id.values():
+            widget.release_surfaces()
+
+    def zoom(self, zoom_in: bool) -> None:
+        if zoom_in is True:
+            levels = [zoom for zoom in ZOOM_LEVELS if zoom > self.geometry.zoom]
+            zoom = min(levels, default=self.geometry.zoom)
+        else:
+            levels = [zoom for zoom in ZOOM_LEVELS if zoom < self.geometry.zoom]
+            zoom = max(levels, default=self.geometry.zoom)
+        if zoom == self.geometry.zoom:
+            return
+        Settings("game_widget").set("zoom", zoom)  # Saved on exit
+        self.set_geometry(TileGeometry(Settings.get_snapshot().game_widget, zoom))
 
     def get_game_position(self, index: int, optimized_width: int) -> tuple[int, int]:
         col = (index - 1) % self.max_games_cols
         row = int((index - 1) / self.max_games_cols)
-        pos_x = col * (GAME_WIDGET_WIDTH + optimized_width)
-        pos_y = row * (GAME_WIDGET_HEIGHT + GAME_DISTANCE_HEIGHT)
+        pos_x = col * (self.geometry.width + optimized_width)
+        pos_y = row * self.geometry.get_row_height()
         return pos_x, pos_y
 
     def update_games_list(self) -> None:
         (visible_width, _) = self.get_parent_size()
+        geometry = self.geometry
 
-        if self._old_width != visible_width:
+        if self._old_width != visible_width or self._layout_geometry is not geometry:
             self._old_width = visible_width
+            self._layout_geometry = geometry
             update_widgets = True
             self.max_games_cols = int(
-                visible_width / (GAME_WIDGET_WIDTH + GAME_DISTANCE_WIDTH)
+                visible_width / (geometry.width + geometry.distance_width)
             )
             if self.max_games_cols == 0:
                 self.max_games_cols = 1
@@ -144,59 +236,87 @@ class UiGameViewport(UiWidgetViewport):
         games_data, list_updated = self.ldb.get_games()
         games_count = len(games_data)
 
-        viewport_height = (int((games_count - 1) / self.max_games_cols) + 1) * (
-            GAME_WIDGET_HEIGHT + GAME_DISTANCE_HEIGHT
-        )
+        viewport_height = (
+            int((games_count - 1) / self.max_games_cols) + 1
+        ) * geometry.get_row_height()
 
-        self.set_size(size_w=GAME_WIDGET_WIDTH, size_h=viewport_height)
+        self.set_size(size_w=geometry.width, size_h=viewport_height)
 
         if self.max_games_cols >= games_count:
-            optimized_distance_width = GAME_DISTANCE_WIDTH
+            optimized_distance_width = geometry.distance_width
         else:
             optimized_distance_width = round(
-                (visible_width - self.max_games_cols * GAME_WIDGET_WIDTH)
+                (visible_width - self.max_games_cols * geometry.width)
                 / self.max_games_cols
             )
 
         if list_updated is True:
             self.set_changed()  # Force redraw if list is empty now
 
-        if not self.game_widgets:
-            for idx, game_data in enumerate(games_data):
-                pos_x, pos_y = self.get_game_position(idx + 1, optimized_distance_width)
-                self.game_widgets.append(
-                    UiGameWidget(self, game_data, pos_x=pos_x, pos_y=pos_y)
+        if update_widgets is False and list_updated is False:
+            return
+
+        if self._games_version != self.ldb.games_version:
+            # Drop widgets of games removed from database
+            self._games_version = self.ldb.games_version
+            game_ids = {game.id for game in self.ldb.games}
+            self.game_widgets_by_id = {
+                game_id: widget
+                for game_id, widget in self.game_widgets_by_id.items()
+                if game_id in game_ids
+            }
+
+        # Reuse existing widgets by game id, so reorder or filter does not rebuild tiles
+        select_top = not self.game_widgets_by_id
+        game_widgets = []
+        for idx, game_data in enumerate(games_data):
+            pos_x, pos_y = self.get_game_position(idx + 1, optimized_distance_width)
+            widget = self.game_widgets_by_id.get(game_data.id)
+            if widget is None:
+                widget = UiGameWidget(
+                    self, game_data, geometry, pos_x=pos_x, pos_y=pos_y
                 )
+                self.game_widgets_by_id[game_data.id] = widget
+            else:
+                if widget.geometry is not geometry:
+                    widget.set_geometry(geometry)
+                if widget.data is not game_data:  # Reloaded from database
+                    widget.name = game_data.name
+                    widget.data = game_data
+                    widget.set_changed()
+                widget.set_pos(pos_x=pos_x, pos_y=pos_y)
+            widget.list_index = idx
+            game_widgets.append(widget)
+        self.game_widgets = game_widgets
+        self.set_children(game_widgets)
+        if select_top is True:
             self.select_game("TOP")
-        elif update_widgets is True or list_updated is True:
-            for idx, game_data in enumerate(games_data):
-                pos_x, pos_y = self.get_game_position(idx + 1, optimized_distance_width)
-                widget_found = False
-                if idx < len(self.game_widgets):
-                    for old_idx in range(idx, len(self.game_widgets)):
-                        widget = self.game_widgets[old_idx]
-                        if widget.name == game_data["name"]:
-                            widget.set_pos(pos_x=pos_x, pos_y=pos_y)
-                            widget.set_changed()
-                            widget_found = True
-                            self.game_widgets.insert(
-                                idx, self.game_widgets.pop(old_idx)
-                            )
-                            break
-                if widget_found is False:
-                    self.game_widgets.insert(
-                        idx, UiGameWidget(self, game_data, pos_x=pos_x, pos_y=pos_y)
-                    )
-            if games_count < len(self.game_widgets):
-                for old_idx in range(games_count, len(self.game_widgets)):
-                    widget = self.game_widgets[old_idx]
-                    self.remove_child(widget)
-                    self.game_widgets.pop(old_idx)
-
-    def select_game(self, command: str) -> bool:
+        elif self._focus_offset is not None and self.focus_child is not None:
+            focus_y = self.focus_child.get_rect().y
+            self.scroll_to(shift_y=max(focus_y - self._focus_offset, 0))
+            self.scroll_to_widget(self.focus_child)
+        self._focus_offset = None
+
+    def get_page_size(self) -> int:
+        assert self.parent_widget
+        viewport_h = self.parent_widget.get_rect(with_borders=False).height
+        rows = max(int(viewport_h / self.geometry.get_row_height()), 1)
+        return rows * self.max_games_cols
+
+    def set_search(self, query: str) -> None:
+        self.ldb.set_search(query)
+        self.update_games_list()
+        self.scroll_to(shift_y=0)
+
+    def set_facet(self, facet: str, value: str | None) -> None:
+        self.ldb.set_facet(facet, value)
+        self.update_games_list()
+        self.scroll_to(shift_y=0)
+
+    def select_game(self, command: str, count: int = 1) -> bool:
         selected_game_index = 0
         if self.focus_child:
-            selected_game_index = self.game_widgets.index(self.focus_child)
+            selected_game_index = cast(UiGameWidget, self.focus_child).list_index
 
         last_game_index = len(self.game_widgets) - 1
         if last_game_index < 0:
@@ -211,22 +331,34 @@ class UiGameViewport(UiWidgetViewport):
                 if selected_game_index == 0:
                     selected_game_index = last_game_index
                 else:
-                    selected_game_index -= self.max_games_cols
+                    selected_game_index -= self.max_games_cols * count
             case "DOWN":
                 if selected_game_index == last_game_index:
                     selected_game_index = 0
                 else:
-                    selected_game_index += self.max_games_cols
+                    selected_game_index += self.max_games_cols * count
             case "LEFT":
                 if selected_game_index == 0:
                     selected_game_index = last_game_index
                 else:
-                    selected_game_index -= 1
+                    selected_game_index -= count
             case "RIGHT":
                 if selected_game_index == last_game_index:
                     selected_game_index = 0
                 else:
-                    selected_game_index += 1
+                    selected_game_index += count
+            case "PAGE_UP":
+                selected_game_index -= self.get_page_size()
+            case "PAGE_DOWN":
+                selected_game_index += self.get_page_size()
+            case "JUMP_PREV":
+                selected_game_index = self.ldb.get_jump_position(
+                    selected_game_index, forward=False
+                )
+            case "JUMP_NEXT":
+                selected_game_index = self.ldb.get_jump_position(
+                    selected_game_index, forward=True
+                )
             case _:
                 raise ValueError(f"Unknown navigation command {command}")
 
@@ -238,17 +370,21 @@ class UiGameViewport(UiWidgetViewport):
         # Select new
         selected_widget = self.game_widgets[selected_game_index]
         selected_widget.set_focus()
+        self.scroll_to_widget(selected_widget)
+        return True
 
+    def scroll_to_widget(self, widget: UiWidget) -> None:
         assert self.parent_widget
         viewport_h = self.parent_widget.get_rect(with_borders=False).height
-        widget_rect = selected_widget.get_rect(with_borders=True)
-        if widget_rect.y < self.shift_y:
-            self.shift_y = widget_rect.y
-
-        if widget_rect.y + widget_rect.h > self.shift_y + viewport_h:
-            self.shift_y = widget_rect.y + widget_rect.h - viewport_h
-
-        return True
+        widget_rect = widget.get_rect(with_borders=True)
+        _, shift_y = self.get_scroll_target()
+        if widget_rect.y < shift_y:
+            self.scroll_to(shift_y=widget_rect.y, animate=True)
+
+        if widget_rect.y + widget_rect.h > shift_y + viewport_h:
+            self.scroll_to(
+                shift_y=widget_rect.y + widget_rect.h - viewport_h, animate=True
+            )
 
     def process_event_focus(self, event: event.Event) -> bool:
         match event.type:
@@ -258,18 +394,94 @@ class UiGameViewport(UiWidgetViewport):
                         self.ldb.data_changed = True
                         self.set_changed()
                         return True
-                    case "TOP" | "BOTTOM" | "LEFT" | "RIGHT" | "UP" | "DOWN":
-                        if self.select_game(event.command) is True:
+                    case "SORT" | "SORT_REVERSE":
+                        if event.command == "SORT":
+                            self.ldb.switch_sort()
+                        else:
+                            _, sort_reverse = self.ldb.get_sort()
+                            self.ldb.set_sort(reverse=not sort_reverse)
+                        self.update_games_list()
+                        self.select_game("TOP")
+                        return True
+                    case "ZOOM_IN" | "ZOOM_OUT":
+                        self.zoom(event.command == "ZOOM_IN")
+                        return True
+                    case "SEARCH":
+                        cast("LutrisUiApp", self.get_root_widget()).search_widget.open()
+                        return True
+                    case "FILTER":
+                        cast("LutrisUiApp", self.get_root_widget()).filter_widget.open()
+                        return True
+                    case (
+                        "TOP"
+                        | "BOTTOM"
+                        | "LEFT"
+                        | "RIGHT"
+                        | "UP"
+                        | "DOWN"
+                        | "PAGE_UP"
+                        | "PAGE_DOWN"
+                        | "JUMP_PREV"
+                        | "JUMP_NEXT"
+                    ):
+                        # Analog stick repeats may contain several steps
+                        count = getattr(event, "count", 1)
+                        if self.select_game(event.command, count) is True:
                             return True
             case constants.MOUSEWHEEL:
-                self.shift_y = self.shift_y - (event.y * GAME_WIDGET_HEIGHT / 4)
-                self.set_changed()
+                self.scroll_by(
+                    shift_y=-event.y * self.geometry.height / 4, animate=True
+                )
                 return True
         return super().process_event_focus(event)
 
+    def prefetch_covers(self) -> None:
+        # Decode covers of the rows about to be scrolled in
+        _, target_y = self.get_scroll_target()
+        _, velocity_y = self._scroll_velocity
+        moving = target_y - self.shift_y + velocity_y * PREFETCH_TIME
+        if moving == 0:  # Touch drag or not animated
+            moving = self.shift_y - self._prefetch_shift_y
+        self._prefetch_shift_y = self.shift_y
+        if moving == 0 or not self.game_widgets:
+            return
+
+        row_height = self.geometry.get_row_height()
+        _, viewport_h = self.get_parent_size()
+        lookahead = max(abs(moving), PREFETCH_ROWS * row_height)
+        if moving > 0:
+            first_row = int((self.shift_y + viewport_h) / row_height)
+            last_row = int((self.shift_y + viewport_h + lookahead) / row_height)
+        else:
+            first_row = max(int((self.shift_y - lookahead) / row_height), 0)
+            last_row = int(self.shift_y / row_height) - 1
+        last_row = min(last_row, (len(self.game_widgets) - 1) // self.max_games_cols)
+        if last_row < first_row or self._prefetch_rows == (first_row, last_row):
+            return
+        self._prefetch_rows = (first_row, last_row)
+
+        widgets = self.game_widgets[
+            first_row * self.max_games_cols : (last_row + 1) * self.max_games_cols
+        ]
+        if not widgets:
+            return
+        if moving < 0:
+            widgets.reverse()  # Nearest first
+        coverarts = [widget.data.coverart for widget in widgets if widget.data.coverart]
+        # Cover size of not selected tiles
+        size_widget = next((w for w in widgets if w.is_focus is False), None)
+        if size_widget is None:
+            size_widget = widgets[0]
+        if coverarts:
+            app = cast("LutrisUiApp", self.get_root_widget())
+            app.cover_cache.prefetch(
+                coverarts, size_widget.get_size(with_borders=False)
+            )
+
     def draw(self) -> None:
         if self.is_changed() or self.is_parent_changed():
             self.update_games_list()
+        self.prefetch_covers()
         return super().draw()
 
 
@@ -2,14 +2,19 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, cast
 
-from pygame import Color, constants
-from uigamelist import GAME_WIDGET_HEIGHT, GAME_WIDGET_WIDTH, UiGameWidget
+from lutrisdb import LAUNCH_POLL_INTERVAL
+from pygame import Color, Surface, constants, event, font, time, transform
+from settings import Settings
+from uigamelist import TileGeometry, UiGameWidget
 from uiwidgets import (Controls, DynamicTypes, UiWidget, UiWidgetStatic,
                        UiWidgetTextBlock)
 
 if TYPE_CHECKING:
+    from gamerecord import GameRecord
     from lutrisuiapp import LutrisUiApp
-    from pygame import event
+
+LAUNCH_INFO_HEIGHT = 40
+LAUNCH_POLL_EVENT = event.custom_type()  # Wakes the main loop while a game starts
 
 
 class UiRunningGameWidget(UiGameWidget):
@@ -46,20 +51,64 @@ class UiTerminateGame(UiWidgetTextBlock):
         return False
 
 
+class UiFogWidget(UiWidgetStatic):
+    # Snapshot of the screen below blended with the fog color once, so changes below
+    # do not need alpha blending of the whole screen
+    def __init__(self, parent: UiWidget, fog_alpha: int, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.fog_alpha = fog_alpha
+        self._snapshot: Surface | None = None
+
+    def capture_snapshot(self) -> None:
+        rect = self.get_rect(with_borders=True)
+        snapshot = self.get_parent_surface().subsurface(rect).copy()
+        fog = Surface(snapshot.get_size())
+        fog.fill(self.bg_color)
+        fog.set_alpha(self.fog_alpha)
+        snapshot.blit(fog, (0, 0))
+        self._snapshot = snapshot
+        self.set_changed()
+
+    def release_snapshot(self) -> None:
+        self._snapshot = None
+
+    def compose(self, surface: Surface) -> None:
+        if self._snapshot is None:
+            return  # Filled by bg_color
+        if self._snapshot.get_size() != surface.get_size():
+            self._snapshot = transform.scale(self._snapshot, surface.get_size())
+        surface.blit(self._snapshot, (0, 0))
+
+
 class UiGameIsRunningWidget(UiWidget):
     def __init__(self, parent: UiWidget, **kwargs):
         super().__init__(parent, **kwargs)
         self.ldb = cast("LutrisUiApp", self.get_root_widget()).ldb
         self.is_visible = False
-        self.game_data = None
-        UiWidgetStatic(self, alpha=200, bg_color="Grey")  # Fog
+        self.game_data: GameRecord | None = None
+        self._launch_polling = False
+        self.fog = UiFogWidget(self, fog_alpha=200, bg_color=Color("Grey"))
         popup = UiWidget(
             self,
             pos_x_type=DynamicTypes.TYPE_CENTER,
             pos_y_type=DynamicTypes.TYPE_CENTER,
         )
+        geometry = TileGeometry(Settings.get_snapshot().game_widget)
         self.game_widget = UiRunningGameWidget(
-            popup, pos_x_type=DynamicTypes.TYPE_CENTER
+            popup, geometry=geometry, pos_x_type=DynamicTypes.TYPE_CENTER
+        )
+        self.launch_info = UiWidgetTextBlock(
+            popup,
+            pos_x_type=DynamicTypes.TYPE_CENTER,
+            pos_y=geometry.height,
+            size_h=LAUNCH_INFO_HEIGHT,
+            bg_color=Color("White"),
+            border_color=self.game_widget.border_color,
+            border_left=10,
+            border_right=10,
+            text_font=font.SysFont(None, 24),
+            text_centered_x=True,
+            text_centered_y=True,
         )
         button_size = 100
         self.button = UiTerminateGame(
@@ -74,9 +123,11 @@ class UiGameIsRunningWidget(UiWidget):
             text_centered_y=True,
         )
         popup.set_size(
-            size_w=GAME_WIDGET_WIDTH, size_h=GAME_WIDGET_HEIGHT + button_size
+            size_w=geometry.width,
+            size_h=geometry.height + LAUNCH_INFO_HEIGHT + button_size,
         )
         self._kill_in_progress = False
+        self._launch_text: str | None = None
 
     def set_kill_running(self):
         if self._kill_in_progress is False:
@@ -85,10 +136,11 @@ class UiGameIsRunningWidget(UiWidget):
             self.button.bg_color = Color("Yellow")
             self.button.set_changed()
 
-    def set_running(self, game_data) -> None:
+    def set_running(self, game_data: GameRecord) -> None:
         self.game_data = game_data
         self._kill_in_progress = False
 
+        self.fog.capture_snapshot()
         self.set_visible()
         self.set_focus()
 
@@ -97,10 +149,37 @@ class UiGameIsRunningWidget(UiWidget):
         self.button.set_focus()
         self.button.set_changed()
 
-        self.game_widget.name = game_data["name"]
+        self.game_widget.name = game_data.name
         self.game_widget.data = game_data
         self.game_widget.set_changed()
+        self._launch_text = None
+        self.update_launch_info()
         self.set_process_tick_enabled()
+        self.set_launch_polling(True)
+
+    def set_launch_polling(self, enabled: bool) -> None:
+        if enabled == self._launch_polling:
+            return
+        self._launch_polling = enabled
+        time.set_timer(
+            LAUNCH_POLL_EVENT, int(LAUNCH_POLL_INTERVAL * 1000) if enabled else 0
+        )
+
+    def update_launch_info(self) -> None:
+        assert self.game_data
+        launch_timer = self.ldb.launch_timer
+        launch_text = launch_timer.get_text() if launch_timer else ""
+        if launch_text == self._launch_text:
+            return
+        self._launch_text = launch_text
+        history_text = self.ldb.launch_history.get_text(self.game_data.id)
+        self.launch_info.text = "   ".join(t for t in (launch_text, history_text) if t)
+        self.launch_info.set_changed()
+
+    def set_visible(self, visible: bool = True) -> None:
+        super().set_visible(visible)
+        if visible is False:
+            self.fog.release_snapshot()
 
     def process_tick(self) -> None:
         if self.game_data is None:
@@ -108,8 +187,15 @@ class UiGameIsRunningWidget(UiWidget):
 
         if self.ldb.check_is_running(self._kill_in_progress) is False:
             self.game_data = None
+            self.set_launch_polling(False)
             cast("LutrisUiApp", self.get_root_widget()).launch_completed()
             self.set_process_tick_enabled(False)
         else:
+            self.update_launch_info()
+            # Woken by timer events until the game process is seen
+            launch_timer = self.ldb.launch_timer
+            self.set_launch_polling(
+                launch_timer is not None and launch_timer.is_starting() is True
+            )
             if self._kill_in_progress is True:
                 self.ldb.kill_running()
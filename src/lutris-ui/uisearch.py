@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, cast
+
+from pygame import Color, constants, key
+from uiwidgets import Controls, DynamicTypes, UiWidgetTextBlock
+
+if TYPE_CHECKING:
+    from lutrisuiapp import LutrisUiApp
+    from pygame import event
+    from uigamelist import UiGameViewport
+    from uiwidgets import UiWidget
+
+# Characters selectable by UP / DOWN without keyboard
+PICKER_CHARS = " abcdefghijklmnopqrstuvwxyz0123456789"
+
+
+class UiSearchWidget(UiWidgetTextBlock):
+    def __init__(self, parent: UiWidget, **kwargs):
+        super().__init__(
+            parent,
+            bg_color=Color("White"),
+            border_color=Color(128, 128, 255),
+            border_all=5,
+            text_centered_x=True,
+            text_centered_y=True,
+            pos_x_type=DynamicTypes.TYPE_CENTER,
+            pos_y=20,
+            size_w_type=DynamicTypes.TYPE_PERCENT,
+            size_w=60,
+            size_h=60,
+            **kwargs,
+        )
+        self.is_visible = False
+        self.query = ""
+        key.stop_text_input()  # Started on open to show on-screen keyboard if any
+
+    def get_games_viewport(self) -> UiGameViewport:
+        app = cast("LutrisUiApp", self.get_root_widget())
+        return cast("UiGameViewport", app.games_viewport.viewport_widget)
+
+    def open(self) -> None:
+        self.set_visible()
+        self.set_focus()
+        key.start_text_input()
+        self.update_text()
+
+    def close(self, keep_filter: bool = True) -> None:
+        if keep_filter is False:
+            self.set_query("")
+        app = cast("LutrisUiApp", self.get_root_widget())
+        app.games_viewport.set_focus()
+        self.get_games_viewport().select_game("TOP")
+
+    def set_query(self, query: str) -> None:
+        self.query = query
+        self.get_games_viewport().set_search(query)
+        self.update_text()
+
+    def update_text(self) -> None:
+        games_count = len(self.get_games_viewport().game_widgets)
+        self.text = f"Search: {self.query}_   ({games_count})"
+        self.set_changed()
+
+    def pick_char(self, step: int) -> None:
+        if not self.query:
+            self.set_query(PICKER_CHARS[step % len(PICKER_CHARS)])
+            return
+        char_idx = PICKER_CHARS.find(self.query[-1].casefold())
+        char = PICKER_CHARS[(char_idx + step) % len(PICKER_CHARS)]
+        self.set_query(self.query[:-1] + char)
+
+    def set_focus(self, focus: bool = True) -> None:
+        super().set_focus(focus)
+        if focus is False and self.is_visible is True:
+            key.stop_text_input()
+            self.set_visible(False)
+
+    def process_event_focus(self, event: event.Event) -> bool:
+        match event.type:
+            case constants.TEXTINPUT:
+                self.set_query(self.query + event.text)
+                return True
+            case constants.KEYDOWN:
+                if event.key == constants.K_BACKSPACE:
+                    self.set_query(self.query[:-1])
+                    return True
+            case Controls.COMMAND_EVENT:
+                origin = event.origin
+                if (
+                    origin is not None
+                    and origin.type == constants.KEYDOWN
+                    and origin.unicode.isprintable()
+                    and origin.unicode != ""
+                ):
+                    return True  # Typed character, added by its TEXTINPUT
+                match event.command:
+                    case "UP":
+                        self.pick_char(1)
+                    case "DOWN":
+                        self.pick_char(-1)
+                    case "RIGHT":
+                        self.set_query(self.query + PICKER_CHARS[1])
+                    case "LEFT":
+                        self.set_query(self.query[:-1])
+                    case "ENTER" | "SEARCH":
+                        self.close()
+                    case "BACK" | "EXIT":
+                        self.close(keep_filter=False)
+                    case _:
+                        return False
+                return True
+        return False
@@ -1,7 +1,13 @@
 from .controls import Controls
 from .dynamicrect import DynamicRect, DynamicTypes
+from .inputrecorder import InputRecorder, ReplayControls
+from .profiler import Profiler
+from .surfacefactory import SurfaceFactory
+from .surfacepool import SurfacePool
+from .tracer import Tracer
 from .uiapp import UiApp
 from .uiwidget import UiWidget
+from .uiwidgetprofiler import UiWidgetProfiler
 from .uiwidgetstatic import UiWidgetStatic
 from .uiwidgettextblock import UiWidgetTextBlock
 from .uiwidgetviewport import UiWidgetViewport, UiWidgetViewportContainer
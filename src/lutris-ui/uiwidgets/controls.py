@@ -1,11 +1,55 @@
 from __future__ import annotations
 
 from time import time
+from typing import TYPE_CHECKING
 
-from pygame import constants, event, joystick
+from pygame import constants, event, joystick, key
 from pygame.time import Clock
 from settings import Settings
 
+if TYPE_CHECKING:
+    from settings import SettingsSnapshot
+
+    from .inputrecorder import InputRecorder
+
+
+# Modifiers allowed for mapped keys
+IGNORED_KEY_MODS = constants.KMOD_CAPS | constants.KMOD_NUM | constants.KMOD_MODE
+
+
+def get_key_code(name: str) -> int | None:
+    try:
+        return key.key_code(name)
+    except ValueError:
+        print(f"Unknown key {name} in keyboard mapping")
+        return None
+
+
+def get_button_code(name: str) -> int | None:
+    # Button number or SDL controller button name like "a" or "dpad_up"
+    if name.isdigit():
+        return int(name)
+    button = getattr(constants, f"CONTROLLER_BUTTON_{name.upper()}", None)
+    if button is None:
+        print(f"Unknown button {name} in joypad mapping")
+    return button
+
+
+def compile_mapping(
+    commands: dict[int, str], options: dict[str, str], get_code
+) -> dict[int, str]:
+    # Config options "key = COMMAND" applied to the defaults. Empty command unmaps
+    compiled = dict(commands)
+    for name, command in options.items():
+        code = get_code(name)
+        if code is None:
+            continue
+        if command:
+            compiled[code] = command.upper()
+        else:
+            compiled.pop(code, None)
+    return compiled
+
 
 # UI Controls proxy
 class Controls:
@@ -22,16 +66,30 @@ class Controls:
         self.keyboard_commands: dict[int, str] = keyboard_commands or {}
         self.joypad_keys_commands: dict[int, str] = joypad_keys_commands or {}
         self.events: list[event.Event] = []
-        settings = Settings("input")
-        self.repeat_time_1: float = settings.get("repeat_time_1", 500)  # ms
-        self.repeat_time_2: float = settings.get("repeat_time_2", 200)  # ms
+        self.events_time: float = 0  # Wall clock when the events were read
+        settings = Settings.get_snapshot().input
+        self.repeat_time_1 = settings.repeat_time_1  # ms
+        self.repeat_time_2 = settings.repeat_time_2  # ms
+        self.stick_max_rate = settings.stick_max_rate  # 1/s
+        Settings.add_listener(self.apply_settings)
 
         self._clock = Clock()
         self._timer1: float = 0  # Timer 1 since key is pressed
         self._timer2: float | None = None  # Timer 2 since key was processed last time
         self._pressed_command: str | None = None
         self._pressed_event: event.Event | None = None
-        self._last_axis = None
+        self._pressed_value: float = 0  # Stick deflection of pressed axis command
+        self._repeat_steps: float = 0  # Not yet sent stick repeats
+        self._last_axis: tuple[int, int] | None = None  # instance_id, axis
+        self._last_axis_command: str | None = None
+        self.joysticks: dict[int, joystick.JoystickType] = {}  # By instance_id
+        # Compiled mappings. Keyboard from [keyboard], per joystick from [joypad]
+        # and [joypad:<guid>] config sections
+        self._key_commands: dict[int, str] = dict(self.keyboard_commands)
+        self._button_commands: dict[int, dict[int, str]] = {}  # By instance_id
+        self._command_added = False  # Only 1 command in game step
+        self._frame_requested = False
+        self.recorder: InputRecorder | None = None
         self.allowed_event_types: list[int] | None = allowed_event_types
 
         if self.allowed_event_types:
@@ -47,11 +105,48 @@ class Controls:
                 constants.JOYDEVICEREMOVED,
             ]
 
-    @staticmethod
-    def init_all_js() -> None:
+    def init_all_js(self) -> None:
         joystick.init()
         for i in range(joystick.get_count()):
-            joystick.Joystick(i).init()
+            self.add_joystick(i)
+
+    def add_joystick(self, device_index: int) -> None:
+        js = joystick.Joystick(device_index)
+        instance_id = js.get_instance_id()
+        if instance_id in self.joysticks:
+            return  # Already opened by init_all_js()
+        js.init()
+        self.joysticks[instance_id] = js
+        self._button_commands[instance_id] = self.compile_button_mapping(js)
+        print(f"Joystick added: {str(js.get_name())}")
+
+    def compile_button_mapping(self, js: joystick.JoystickType) -> dict[int, str]:
+        button_commands = compile_mapping(
+            self.joypad_keys_commands,
+            Settings("joypad").get_options(),
+            get_button_code,
+        )
+        return compile_mapping(
+            button_commands,
+            Settings(f"joypad:{js.get_guid()}").get_options(),
+            get_button_code,
+        )
+
+    def remove_joystick(self, instance_id: int) -> None:
+        js = self.joysticks.pop(instance_id, None)
+        if js is None:
+            return
+        print(f"Joystick removed: {str(js.get_name())}")
+        js.quit()
+        del self._button_commands[instance_id]
+        # Forget the state of the removed device
+        if self._last_axis is not None and self._last_axis[0] == instance_id:
+            self._last_axis = None
+        if getattr(self._pressed_event, "instance_id", None) == instance_id:
+            self._release()
+
+    def get_joysticks(self) -> list[joystick.JoystickType]:
+        return list(self.joysticks.values())
 
     @staticmethod
     def _is_same(event1: event.Event, event2: event.Event) -> bool:
@@ -88,7 +183,11 @@ class Controls:
         else:
             self._pressed_command = command
             self._pressed_event = event
-            self._timer1 = time()
+            self._pressed_value = 0
+            if event.type == constants.JOYAXISMOTION:
+                self._pressed_value = abs(event.value)
+            self._repeat_steps = 0
+            self._timer1 = self.get_time()
             self._timer2 = None
             return True  # Pressed first time
 
@@ -106,7 +205,7 @@ class Controls:
         if self._pressed_command is None:
             return None
 
-        now = time()
+        now = self.get_time()
 
         # Repeat time 1 not reached
         if (now - self._timer1) * 1000 < self.repeat_time_1 and self._timer2 is None:
@@ -120,6 +219,23 @@ class Controls:
                 {"command": self._pressed_command, "origin": self._pressed_event},
             )
 
+        if self._pressed_value > 0:
+            # Analog stick. Possibly more steps than frames at high rate
+            self._repeat_steps += (now - self._timer2) * self._get_stick_rate()
+            self._timer2 = now
+            steps = int(self._repeat_steps)
+            if steps == 0:
+                return None
+            self._repeat_steps -= steps
+            return event.Event(
+                Controls.COMMAND_EVENT,
+                {
+                    "command": self._pressed_command,
+                    "origin": self._pressed_event,
+                    "count": steps,
+                },
+            )
+
             # Repeat time 2 not reached
         if (now - self._timer2) * 1000 < self.repeat_time_2:
             return None
@@ -130,6 +246,13 @@ class Controls:
             {"command": self._pressed_command, "origin": self._pressed_event},
         )
 
+    def _get_stick_rate(self) -> float:
+        # Repeats per second. repeat_time_2 rate at press threshold up to
+        # stick_max_rate at full deflection
+        base_rate = 1000 / self.repeat_time_2
+        deflection = min(max((self._pressed_value - 0.8) / 0.2, 0), 1)
+        return base_rate + (self.stick_max_rate - base_rate) * deflection**2
+
     @staticmethod
     def _dir_to_code(x: float, y: float) -> tuple[str | None, float]:
         press = 0.1
@@ -156,8 +279,9 @@ class Controls:
     def _append_custom_event(
         self, command: str, custom_event: event.Event, events: list
     ):
-        if any(e.type == Controls.COMMAND_EVENT for e in events):
+        if self._command_added is True:
             return  # Only 1 command in game step
+        self._command_added = True
         events.append(
             event.Event(
                 Controls.COMMAND_EVENT, {"command": command, "origin": custom_event}
@@ -176,23 +300,17 @@ class Controls:
         for e in events:
             match e.type:
                 case constants.KEYDOWN:
-                    code = self.keyboard_commands.get(e.key)
-                    if code is not None and (
-                        e.mod
-                        & ~(
-                            constants.KMOD_CAPS
-                            | constants.KMOD_NUM
-                            | constants.KMOD_MODE
-                        )
-                        == constants.KMOD_NONE
-                    ):
+                    code = self._key_commands.get(e.key)
+                    if code is not None and e.mod & ~IGNORED_KEY_MODS == 0:
                         self._append_custom_event(code, e, events)
 
                 case constants.KEYUP:
                     self._release(e)
 
                 case constants.JOYBUTTONDOWN:
-                    code = self.joypad_keys_commands.get(e.button)
+                    code = self._button_commands.get(
+                        e.instance_id, self.joypad_keys_commands
+                    ).get(e.button)
                     if code is not None:
                         self._append_custom_event(code, e, events)
                 case constants.JOYBUTTONUP:
@@ -212,11 +330,18 @@ class Controls:
                         code, value = self._dir_to_code(e.value, 0)
                     elif e.axis == constants.CONTROLLER_AXIS_LEFTY:
                         code, value = self._dir_to_code(0, -e.value)
+                    if self._pressed_value > 0 and self._last_axis == (
+                        e.instance_id,
+                        e.axis,
+                    ):
+                        self._pressed_value = max(value, 0.5)  # Held stick moved
                     if code is not None:
-                        if code == "RELEASE" and (axis is None or e.axis == axis):
+                        if code == "RELEASE" and (
+                            axis is None or (e.instance_id, e.axis) == axis
+                        ):
                             axis_released = True
                         elif value > axis_command_value:
-                            axis = e.axis
+                            axis = (e.instance_id, e.axis)
                             axis_command = code
                             axis_command_value = value
                             axis_command_event = e
@@ -226,37 +351,69 @@ class Controls:
             self._release()
             self._last_axis = None
         elif (
-            axis_command and axis_command_event is not None and self._last_axis != axis
+            axis_command
+            and axis_command_event is not None
+            and (self._last_axis != axis or self._last_axis_command != axis_command)
         ):
+            # New axis, or the stick was reversed without a release in between
             self._last_axis = axis
+            self._last_axis_command = axis_command
             self._append_custom_event(axis_command, axis_command_event, events)
 
+    def apply_settings(
+        self, old_settings: SettingsSnapshot, new_settings: SettingsSnapshot
+    ) -> None:
+        self.repeat_time_1 = new_settings.input.repeat_time_1
+        self.repeat_time_2 = new_settings.input.repeat_time_2
+        self.stick_max_rate = new_settings.input.stick_max_rate
+        self.load_key_mappings()
+        for instance_id, js in self.joysticks.items():
+            self._button_commands[instance_id] = self.compile_button_mapping(js)
+
     def init(self) -> None:
+        self.load_key_mappings()
         self.init_all_js()
 
-    def update_controls(self) -> None:
-        self.events.clear()
-        if self._pressed_command is None:
+    def load_key_mappings(self) -> None:
+        self._key_commands = compile_mapping(
+            self.keyboard_commands, Settings("keyboard").get_options(), get_key_code
+        )
+
+    def get_time(self) -> float:
+        return time()
+
+    def read_events(self) -> list[event.Event]:
+        events = []
+        if self._pressed_command is None and self._frame_requested is False:
             wait_event = event.wait(timeout=5000)
             if wait_event.type != constants.NOEVENT:
-                self.events.append(wait_event)
-        self.events += event.get()
+                events.append(wait_event)
+        events += event.get()
+        return events
+
+    def update_controls(self) -> None:
+        self.events.clear()
+        self.events += self.read_events()
+        self.events_time = time()
+        self._frame_requested = False
+        self._command_added = False
+        if self.recorder is not None:
+            self.recorder.add_events(self.get_time(), self.get_tick_time(), self.events)
 
         # Basic processing. Track release key
         if self.events:
             for e in self.events:
                 match e.type:
                     case constants.JOYDEVICEADDED:
-                        js = joystick.Joystick(e.device_index)
-                        self.init_all_js()
-                        print(f"Joystick added: {str(js.get_name())}")
+                        self.add_joystick(e.device_index)
                     case constants.JOYDEVICEREMOVED:
-                        print(f"Joystick removed: {e.instance_id}")
-                        self.init_all_js()
+                        self.remove_joystick(e.instance_id)
                     case constants.KEYUP:
                         self._release(e)
                     case constants.JOYBUTTONUP:  # instance_id, button
                         self._release(e)
+                    case Controls.COMMAND_EVENT:  # Posted by application
+                        self._command_added = True
 
             # Map to custom events
             self._apply_custom_events(self.events)
@@ -266,10 +423,13 @@ class Controls:
         # Apply repeated key
         repeat_event = self._get_repeated_key()
         if repeat_event is not None:
-            if any(e.type == Controls.COMMAND_EVENT for e in self.events):
+            if self._command_added is True:
                 return  # Only 1 command in game step
             self.events.append(repeat_event)
 
+    def request_frame(self) -> None:
+        self._frame_requested = True  # Do not wait for events in next update_controls()
+
     def game_tick(self) -> None:
         self._clock.tick(30)  # limits FPS to 30
 
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import json
+from time import sleep, time
+
+from pygame import constants, event
+
+from .controls import Controls
+
+RECORDING_VERSION = 1
+SKIPPED_EVENT_TYPES = (constants.JOYDEVICEADDED, constants.JOYDEVICEREMOVED)
+
+
+def get_event_attributes(recorded_event: event.Event) -> dict:
+    # Values without JSON representation (like window or origin) are not recorded
+    return {
+        key: value
+        for key, value in recorded_event.dict.items()
+        if value is None or isinstance(value, (bool, int, float, str, tuple, list))
+    }
+
+
+def load_recording(
+    file_name: str,
+) -> tuple[dict, list[tuple[float, float, list[event.Event]]]]:
+    with open(file_name) as f:
+        header = json.loads(f.readline())
+        if header.get("version") != RECORDING_VERSION:
+            raise ValueError(f"Unsupported recording version in {file_name}")
+        batches = []
+        for line in f:
+            batch_time, tick_time, events = json.loads(line)
+            batches.append(
+                (
+                    batch_time,
+                    tick_time,
+                    [
+                        event.Event(
+                            event_type,
+                            {
+                                key: tuple(value) if isinstance(value, list) else value
+                                for key, value in attributes.items()
+                            },
+                        )
+                        for event_type, attributes in events
+                    ],
+                )
+            )
+    return header, batches
+
+
+# Write the raw events read by Controls.update_controls() with timestamps.
+# One JSON line per frame, also without events, so the frame and tick times are kept
+class InputRecorder:
+    def __init__(self, file_name: str, controls: Controls):
+        self._file = open(file_name, "w")
+        self._start_time = controls.get_time()
+        header = {
+            "version": RECORDING_VERSION,
+            "time": time(),
+            "repeat_time_1": controls.repeat_time_1,
+            "repeat_time_2": controls.repeat_time_2,
+        }
+        self._file.write(json.dumps(header) + "\n")
+        controls.recorder = self
+
+    def add_events(
+        self, event_time: float, tick_time: float, events: list[event.Event]
+    ) -> None:
+        recorded = [
+            [e.type, get_event_attributes(e)]
+            for e in events
+            if e.type not in SKIPPED_EVENT_TYPES
+        ]
+        line = [round(event_time - self._start_time, 6), tick_time, recorded]
+        self._file.write(json.dumps(line) + "\n")
+
+    def close(self) -> None:
+        self._file.close()
+
+
+# Controls fed by a recording. Each update_controls() gets the events of the next
+# recorded frame and the clock is set to the recorded times, so the key repeat
+# and animations behave like in the recorded session. speed 1 is the original pace,
+# 0 is as fast as possible. A QUIT event is sent at the end of the recording
+class ReplayControls(Controls):
+    def __init__(self, file_name: str, speed: float = 0, **kwargs):
+        super().__init__(**kwargs)
+        header, self._batches = load_recording(file_name)
+        self.repeat_time_1 = header.get("repeat_time_1", self.repeat_time_1)
+        self.repeat_time_2 = header.get("repeat_time_2", self.repeat_time_2)
+        self.speed = speed
+        self._time: float = 0
+        self._tick_time: float = 0
+        self._next_batch = 0
+        self._replay_start: float | None = None
+
+    def init(self) -> None:
+        self.load_key_mappings()  # No real joysticks needed
+
+    def get_time(self) -> float:
+        return self._time
+
+    def read_events(self) -> list[event.Event]:
+        if self._next_batch >= len(self._batches):
+            return [event.Event(constants.QUIT)]
+
+        batch_time, tick_time, events = self._batches[self._next_batch]
+        self._next_batch += 1
+        if self.speed > 0:
+            if self._replay_start is None:
+                self._replay_start = time() - batch_time / self.speed
+            wait_time = self._replay_start + batch_time / self.speed - time()
+            if wait_time > 0:
+                sleep(wait_time)
+        self._tick_time = tick_time
+        self._time = batch_time
+        return list(events)
+
+    def game_tick(self) -> None:
+        return  # Paced by read_events()
+
+    def get_tick_time(self) -> float:
+        return self._tick_time
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from collections import deque
+from functools import wraps
+from time import perf_counter
+from typing import Callable
+
+from .uiwidget import UiWidget
+
+PROFILED_METHODS = ("draw", "draw_blit", "compose")
+HISTORY_FRAMES = 300
+
+
+# Frame and per widget draw timings. The widget methods are wrapped only while
+# the profiler is enabled, so there is no overhead if disabled
+class Profiler:
+    enabled: bool = False
+    frame_times: deque[float] = deque(maxlen=HISTORY_FRAMES)  # ms
+    frame_starts: deque[float] = deque(maxlen=HISTORY_FRAMES)  # s
+    event_time: float = 0  # ms in last frame
+    widget_times: dict[str, float] = {}  # "Class.method": ms in last frame
+    _wrapped: list[tuple[type, str, Callable]] = []
+    _frame_widget_times: dict[str, float] = {}
+    _child_times: list[float] = []  # Time of nested calls per running call
+    _frame_start: float = 0
+    _event_start: float = 0
+
+    @staticmethod
+    def enable(enabled: bool = True) -> None:
+        if Profiler.enabled == enabled:
+            return
+        Profiler.enabled = enabled
+        if enabled is False:
+            for cls, name, method in Profiler._wrapped:
+                setattr(cls, name, method)
+            Profiler._wrapped.clear()
+            return
+
+        Profiler.frame_times.clear()
+        Profiler.frame_starts.clear()
+        classes = [UiWidget]
+        while classes:
+            cls = classes.pop()
+            classes += cls.__subclasses__()
+            for name in PROFILED_METHODS:
+                method = cls.__dict__.get(name)
+                if method is not None and not UiWidget.is_draw_forwarder(cls, name):
+                    Profiler._wrapped.append((cls, name, method))
+                    setattr(cls, name, Profiler._wrap(method))
+
+    @staticmethod
+    def _wrap(method: Callable) -> Callable:
+        @wraps(method)
+        def wrapper(widget: UiWidget, *args, **kwargs):
+            child_times = Profiler._child_times
+            child_times.append(0)
+            start = perf_counter()
+            try:
+                return method(widget, *args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                own_time = (elapsed - child_times.pop()) * 1000
+                if child_times:
+                    child_times[-1] += elapsed
+                key = f"{type(widget).__name__}.{method.__name__}"
+                widget_times = Profiler._frame_widget_times
+                widget_times[key] = widget_times.get(key, 0) + own_time
+
+        return wrapper
+
+    @staticmethod
+    def begin_frame() -> None:
+        Profiler._frame_start = perf_counter()
+        Profiler._frame_widget_times = {}
+        Profiler.event_time = 0
+
+    @staticmethod
+    def begin_events() -> None:
+        Profiler._event_start = perf_counter()
+
+    @staticmethod
+    def end_events() -> None:
+        Profiler.event_time = (perf_counter() - Profiler._event_start) * 1000
+
+    @staticmethod
+    def end_frame() -> None:
+        Profiler.frame_times.append((perf_counter() - Profiler._frame_start) * 1000)
+        Profiler.frame_starts.append(Profiler._frame_start)
+        Profiler.widget_times = Profiler._frame_widget_times
+
+    @staticmethod
+    def get_fps() -> float:
+        if len(Profiler.frame_starts) < 2:
+            return 0
+        last_start = Profiler.frame_starts[-1]
+        frames = [s for s in Profiler.frame_starts if last_start - s < 1]
+        if len(frames) < 2:
+            return 0
+        return (len(frames) - 1) / (last_start - frames[0])
+
+    @staticmethod
+    def get_histogram(bounds: list[float]) -> list[int]:
+        # Frames count per bucket. Last bucket is for frames longer than bounds[-1]
+        counts = [0] * (len(bounds) + 1)
+        for frame_time in Profiler.frame_times:
+            idx = 0
+            while idx < len(bounds) and frame_time >= bounds[idx]:
+                idx += 1
+            counts[idx] += 1
+        return counts
+
+    @staticmethod
+    def get_top_widgets(count: int) -> list[tuple[str, float]]:
+        return sorted(Profiler.widget_times.items(), key=lambda t: t[1])[::-1][:count]
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from pygame import SRCALPHA, Surface, display
+
+
+# Create surfaces in the display pixel format, so blits do not need a conversion
+class SurfaceFactory:
+    generation: int = 0  # Increased if the display pixel format is changed
+    _display_format: tuple | None = None
+
+    @staticmethod
+    def get_display_format() -> tuple | None:
+        display_surface = display.get_surface()
+        if display_surface is None:
+            return None
+        return display_surface.get_bitsize(), display_surface.get_masks()
+
+    @staticmethod
+    def update_display_format() -> None:
+        display_format = SurfaceFactory.get_display_format()
+        if display_format != SurfaceFactory._display_format:
+            SurfaceFactory._display_format = display_format
+            SurfaceFactory.generation += 1
+
+    @staticmethod
+    def create(size: tuple[int, int], flags: int = 0) -> Surface:
+        return SurfaceFactory.convert(Surface(size, flags=flags))
+
+    @staticmethod
+    def convert(surface: Surface) -> Surface:
+        if SurfaceFactory._display_format is None:
+            return surface  # No display yet
+        bitsize, masks = SurfaceFactory._display_format
+        if surface.get_flags() & SRCALPHA:
+            if surface.get_bitsize() == 32 and surface.get_masks()[:3] == masks[:3]:
+                return surface
+            return surface.convert_alpha()
+        if surface.get_bitsize() == bitsize and surface.get_masks() == masks:
+            return surface
+        return surface.convert()
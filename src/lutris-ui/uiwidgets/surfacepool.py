@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from pygame import SRCALPHA, Rect, Surface
+
+from .surfacefactory import SurfaceFactory
+
+BUCKET_BITS = 3  # 8 size buckets per power of two. Max. 12.5% unused per side
+
+
+# Reuse surfaces released on widget resize. The surfaces are allocated in bucket
+# sizes, the widget gets a subsurface of the requested size.
+# Surfaces are pooled by size and SRCALPHA flag
+class SurfacePool:
+    max_bytes: int = 64 * 1024 * 1024  # Retained free surfaces
+    hits: int = 0
+    misses: int = 0
+    dropped: int = 0
+    retained_bytes: int = 0
+    _free: dict[tuple[int, int, int], list[Surface]] = {}  # (w, h, flags): surfaces
+    _generation: int = SurfaceFactory.generation
+
+    @staticmethod
+    def get_bucket_size(size: tuple[int, int]) -> tuple[int, int]:
+        def bucket(value: int) -> int:
+            step = 1 << max(value.bit_length() - 1 - BUCKET_BITS, 0)
+            return max(-(-value // step) * step, 1)
+
+        return bucket(size[0]), bucket(size[1])
+
+    @staticmethod
+    def acquire(size: tuple[int, int], flags: int = 0) -> Surface:
+        if SurfacePool._generation != SurfaceFactory.generation:
+            SurfacePool.clear()  # Display format changed
+            SurfacePool._generation = SurfaceFactory.generation
+
+        bucket_w, bucket_h = SurfacePool.get_bucket_size(size)
+        key = (bucket_w, bucket_h, flags & SRCALPHA)
+        surfaces = SurfacePool._free.get(key)
+        if surfaces:
+            surface = surfaces.pop()
+            if not surfaces:
+                del SurfacePool._free[key]
+            SurfacePool.retained_bytes -= SurfacePool._get_bytes(surface)
+            SurfacePool.hits += 1
+            surface.fill(0)  # Like a new surface
+        else:
+            surface = SurfaceFactory.create((bucket_w, bucket_h), flags)
+            SurfacePool.misses += 1
+        return surface.subsurface(Rect((0, 0), size))
+
+    @staticmethod
+    def release(surface: Surface) -> None:
+        # The surface and its subsurfaces should not be used after release
+        pooled = surface.get_parent()
+        assert pooled is not None, "Surface is not from SurfacePool.acquire()"
+        surface_bytes = SurfacePool._get_bytes(pooled)
+        if surface_bytes > SurfacePool.max_bytes:
+            SurfacePool.dropped += 1
+            return
+
+        key = (pooled.get_width(), pooled.get_height(), pooled.get_flags() & SRCALPHA)
+        SurfacePool._free.setdefault(key, []).append(pooled)
+        SurfacePool.retained_bytes += surface_bytes
+        while SurfacePool.retained_bytes > SurfacePool.max_bytes:
+            # Drop from the longest unused size first
+            old_key = next(iter(SurfacePool._free))
+            old_surfaces = SurfacePool._free[old_key]
+            old_surface = old_surfaces.pop(0)
+            if not old_surfaces:
+                del SurfacePool._free[old_key]
+            SurfacePool.retained_bytes -= SurfacePool._get_bytes(old_surface)
+            SurfacePool.dropped += 1
+
+    @staticmethod
+    def clear() -> None:
+        SurfacePool._free.clear()
+        SurfacePool.retained_bytes = 0
+
+    @staticmethod
+    def get_stats() -> dict[str, int]:
+        return {
+            "hits": SurfacePool.hits,
+            "misses": SurfacePool.misses,
+            "dropped": SurfacePool.dropped,
+            "retained_surfaces": sum(len(s) for s in SurfacePool._free.values()),
+            "retained_bytes": SurfacePool.retained_bytes,
+        }
+
+    @staticmethod
+    def _get_bytes(surface: Surface) -> int:
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+from collections import deque
+from functools import wraps
+from os import getpid
+from threading import get_native_id
+from time import perf_counter
+from typing import Callable
+
+from .uiwidget import UiWidget
+
+TRACED_WIDGET_METHODS = ("draw", "draw_blit", "compose")
+
+
+# Record spans in Chrome trace event format, loadable in Perfetto or chrome://tracing.
+# The events are kept in a ring buffer, only the last max_events are saved
+class Tracer:
+    enabled: bool = False
+    file_name: str | None = None
+    _events: deque[tuple[str, str, float, float, int]] = deque()
+
+    @staticmethod
+    def enable(file_name: str, max_events: int = 200000) -> None:
+        # Widget methods are wrapped for the whole session
+        if Tracer.enabled is True:
+            return
+        Tracer.enabled = True
+        Tracer.file_name = file_name
+        Tracer._events = deque(maxlen=max_events)
+        classes = [UiWidget]
+        while classes:
+            cls = classes.pop()
+            classes += cls.__subclasses__()
+            for name in TRACED_WIDGET_METHODS:
+                method = cls.__dict__.get(name)
+                if method is not None and not UiWidget.is_draw_forwarder(cls, name):
+                    setattr(cls, name, Tracer._wrap_widget_method(method))
+
+    @staticmethod
+    def get_time() -> float:
+        return perf_counter()
+
+    @staticmethod
+    def add_span(name: str, category: str, start: float) -> float:
+        end = perf_counter()
+        Tracer._events.append((name, category, start, end - start, get_native_id()))
+        return end
+
+    @staticmethod
+    def traced(category: str) -> Callable[[Callable], Callable]:
+        # Decorator for not frequently called functions. Only checks the flag if disabled
+        def decorator(func: Callable) -> Callable:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if Tracer.enabled is False:
+                    return func(*args, **kwargs)
+                start = perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    Tracer.add_span(func.__qualname__, category, start)
+
+            return wrapper
+
+        return decorator
+
+    @staticmethod
+    def _wrap_widget_method(method: Callable) -> Callable:
+        @wraps(method)
+        def wrapper(widget: UiWidget, *args, **kwargs):
+            start = perf_counter()
+            try:
+                return method(widget, *args, **kwargs)
+            finally:
+                Tracer.add_span(
+                    f"{type(widget).__name__}.{method.__name__}", "widget", start
+                )
+
+        return wrapper
+
+    @staticmethod
+    def save() -> None:
+        if Tracer.enabled is False or Tracer.file_name is None:
+            return
+        pid = getpid()
+        trace_events = [
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": start * 1000000,
+                "dur": duration * 1000000,
+                "pid": pid,
+                "tid": tid,
+            }
+            for name, category, start, duration, tid in Tracer._events
+        ]
+        trace = {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+        try:
+            with open(Tracer.file_name, "w") as f:
+                json.dump(trace, f)
+        except OSError as e:
+            print(f"Trace not saved: {e}")
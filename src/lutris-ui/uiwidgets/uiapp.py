@@ -1,11 +1,16 @@
 from __future__ import annotations
 
-from pygame import constants, display, event, font
+from pygame import Surface, constants, display, event, font
 from pygame import quit as pygame_quit
-from pygame import Surface
 
 from .controls import Controls
+from .profiler import Profiler
+from .surfacefactory import SurfaceFactory
+from .tracer import Tracer
 from .uiwidget import UiWidget
+from .uiwidgetprofiler import UiWidgetProfiler
+
+RESIZE_DELAY = 0.15  # s, relayout if no more window size changes in this time
 
 
 class UiApp(UiWidget):
@@ -29,14 +34,20 @@ class UiApp(UiWidget):
         self.size_h = size_h
         self.fullscreen = fullscreen
         self.noframe = noframe
+        self._resize_time: float | None = None
+        self._layout_size: tuple[int, int] = (0, 0)
+        self._restored = False
+        self._profiler_widget: UiWidgetProfiler | None = None
         self.init_display_settings(reset=True)
         event.set_blocked(None)
         event.set_allowed(controls.allowed_event_types)
         self.exit_loop = False
 
     def init_display_settings(self, reset: bool = False) -> None:
-        display.init()
-        font.init()
+        if display.get_init() is False:
+            display.init()
+        if font.get_init() is False:
+            font.init()
         if self.fullscreen is True:
             flags = constants.RESIZABLE + constants.FULLSCREEN
             size = (0, 0)
@@ -56,12 +67,14 @@ class UiApp(UiWidget):
             size = (self.size_w, self.size_h)
 
         self._detached_surface = display.set_mode(size, flags)
+        SurfaceFactory.update_display_format()
         self.set_parent_surface(self)
 
     def set_parent_surface(self, parent: UiWidget) -> None:
         self._detached_surface_changed = True
         self._detached_surface = display.get_surface()
         self._dyn_rect.set_parent_size_by_surface(self._detached_surface)
+        self._layout_size = self._detached_surface.get_size()
         self.set_changed()
 
     def get_parent_surface(self) -> Surface:
@@ -83,13 +96,28 @@ class UiApp(UiWidget):
         super().unset_changed()
         self._detached_surface_changed = False
 
+    def toggle_profiler(self) -> None:
+        Profiler.enable(not Profiler.enabled)
+        if self._profiler_widget is None:
+            self._profiler_widget = UiWidgetProfiler(self)
+        self._profiler_widget.set_visible(Profiler.enabled)
+        if Profiler.enabled is False:
+            self.set_changed()  # Redraw the area below
+
     def process_event_focus(self, event: event.Event) -> bool:
+        if event.type == Controls.COMMAND_EVENT and event.command == "PROFILER":
+            self.toggle_profiler()
+            return True
         event_done = super().process_event_focus(event)
         if event_done is True:
             return True
 
         if event.type in (constants.WINDOWSIZECHANGED, constants.WINDOWRESTORED):
-            self.set_changed()
+            # Wait for the final size, relayout in process_tick()
+            self._resize_time = self.controls.get_time()
+            if event.type == constants.WINDOWRESTORED:
+                self._restored = True
+            self.controls.request_frame()
             return True
         elif event.type == constants.QUIT or (
             event.type == Controls.COMMAND_EVENT and event.command == "EXIT"
@@ -98,6 +126,21 @@ class UiApp(UiWidget):
             return True
         return False
 
+    def process_tick(self) -> None:
+        super().process_tick()
+        if self._resize_time is None:
+            return
+        if self.controls.get_time() - self._resize_time < RESIZE_DELAY:
+            self.controls.request_frame()
+            return
+
+        self._resize_time = None
+        size = self._detached_surface.get_size()
+        if size != self._layout_size or self._restored is True:
+            self._layout_size = size
+            self._restored = False
+            self.set_changed()
+
     def process_events(self, events: list) -> None:
         if not events:
             return
@@ -112,9 +155,15 @@ class UiApp(UiWidget):
                     break
             else:
                 if self.process_event_focus(e) is True:
+                    if e.type == constants.TEXTINPUT:
+                        continue  # All text typed in this frame is consumed
                     break
 
     def draw(self) -> None:
+        if self._detached_surface.get_size() != self._layout_size:
+            return  # Layout does not fit the window until the resize is done
+        if display.get_active() is False:
+            return  # Iconified or hidden. Changes are drawn after restore
         super().draw()
         if self.updated is True:
             display.flip()
@@ -124,14 +173,39 @@ class UiApp(UiWidget):
 
     def run(self):
         self.controls.init()
+        tracing = Tracer.enabled
+        start = 0.0
         while True:
+            if tracing is True:
+                start = Tracer.get_time()
             self.controls.update_controls()
+            if tracing is True:
+                start = Tracer.add_span("update_controls", "frame", start)
+            profiler_enabled = Profiler.enabled
+            if profiler_enabled is True:
+                Profiler.begin_frame()
             self.process_tick()
+            if tracing is True:
+                start = Tracer.add_span("process_tick", "frame", start)
             if self.exit_loop is True:
                 break
+            if profiler_enabled is True:
+                Profiler.begin_events()
             self.process_events(self.controls.events)
+            if profiler_enabled is True:
+                Profiler.end_events()
+            if tracing is True:
+                start = Tracer.add_span("process_events", "frame", start)
             if self.exit_loop is True:
                 break
             self.draw()
+            if tracing is True:
+                start = Tracer.add_span("draw", "frame", start)
+            if profiler_enabled is True and Profiler.enabled is True:
+                Profiler.end_frame()
+                assert self._profiler_widget
+                self._profiler_widget.set_changed()  # Show in next frame
             self.controls.game_tick()
+            if tracing is True:
+                Tracer.add_span("game_tick", "frame", start)
         pygame_quit()
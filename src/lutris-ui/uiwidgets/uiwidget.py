@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable
 
 from pygame import Rect, constants, draw
 
@@ -12,6 +12,8 @@ if TYPE_CHECKING:
 
 
 class UiWidget:
+    blit_batched = False  # draw_blit() returns the blit to the parent surface
+
     def __init__(
         self,
         parent: UiWidget | None = None,
@@ -32,6 +34,7 @@ class UiWidget:
         self.updated = False
 
         self.widgets: list[UiWidget] | None = None
+        self.overlapping_children = True  # False skips the sibling checks
         self.focus_child: UiWidget | None = None
         self.bg_color = bg_color
         self.border_color = border_color
@@ -87,8 +90,15 @@ class UiWidget:
     def get_surface(self, with_borders: bool = False) -> Surface:
         parent_surface = self.get_parent_surface()
         rect = self.get_rect(with_borders)
+        if self.parent_widget is not None:
+            offset_x, offset_y = self.parent_widget.get_child_offset()
+            rect = rect.move(-offset_x, -offset_y)
         return parent_surface.subsurface(rect)
 
+    def get_child_offset(self) -> tuple[int, int]:
+        # Position of get_surface() in coordinates of the child widgets
+        return 0, 0
+
     def compose(self, surface: Surface) -> bool | None:
         return False
 
@@ -156,14 +166,18 @@ class UiWidget:
         if parent_changed is True:
             return parent_changed
 
+        if self.parent_widget.overlapping_children is False:
+            return False
+
         assert self.parent_widget.widgets
         own_idx = self.parent_widget.widgets.index(self)
+        own_rect: Rect | None = None
         for idx in range(0, own_idx):
             under_widget = self.parent_widget.widgets[idx]
             if under_widget.is_visible is True and under_widget.updated is True:
-                if self.get_rect(with_borders=True).colliderect(
-                    under_widget.get_rect(with_borders=True)
-                ):
+                if own_rect is None:
+                    own_rect = self.get_rect(with_borders=True)
+                if own_rect.colliderect(under_widget.get_rect(with_borders=True)):
                     return True
         return False
 
@@ -179,6 +193,17 @@ class UiWidget:
             if self.parent_widget:
                 self.parent_widget.set_child_changed()
 
+    def set_parent_changed(self) -> None:
+        # Parent surface was redrawn without drawing this widget
+        self.set_changed()
+
+    def release_surfaces(self) -> None:
+        # Free cached surfaces to save memory. They are recreated on next draw
+        if self.widgets is not None:
+            for widget in self.widgets:
+                widget.release_surfaces()
+        self.set_changed()
+
     def unset_changed(self) -> None:
         self._is_changed = False
         self._child_changed = False
@@ -251,14 +276,46 @@ class UiWidget:
         if self.widgets and (
             self._child_changed is True or self.is_changed() or self.is_parent_changed()
         ):
-            for widget in self.widgets:
-                widget.draw()
-                if widget.updated is True:
-                    self.updated = True
+            if self.draw_children(self.widgets) is True:
+                self.updated = True
 
         if self.updated is True:
             self.unset_changed()
 
+    def draw_blit(self) -> tuple[Surface, Rect] | None:
+        # Draw into the parent surface. UiWidgetStatic returns the blit instead
+        self.draw()
+        return None
+
+    @staticmethod
+    def is_draw_forwarder(widget_class: type[UiWidget], name: str) -> bool:
+        # draw() of batched and draw_blit() of not batched widgets only forward the
+        # call. Skipped by Profiler and Tracer, so the draw time is not counted twice
+        if name == "draw":
+            return widget_class.blit_batched is True
+        if name == "draw_blit":
+            return widget_class.blit_batched is False
+        return False
+
+    def draw_children(self, widgets: Iterable[UiWidget]) -> bool:
+        # Blits of the children are collected for one Surface.blits() call.
+        # Returns True if a child was updated
+        updated = False
+        blits: list[tuple[Surface, Rect]] = []
+        for widget in widgets:
+            if widget.blit_batched is False and blits:
+                # Keep the drawing order
+                self.get_surface(with_borders=False).blits(blits, doreturn=False)
+                blits.clear()
+            blit = widget.draw_blit()
+            if blit is not None:
+                blits.append(blit)
+            if widget.updated is True:
+                updated = True
+        if blits:
+            self.get_surface(with_borders=False).blits(blits, doreturn=False)
+        return updated
+
     def add_child(self, widget: UiWidget) -> None:
         widget.parent_widget = self
         if self.widgets is None:
@@ -272,6 +329,18 @@ class UiWidget:
         if len(self.widgets) == 0:
             self.widgets = None
 
+    def set_children(self, widgets: list[UiWidget]) -> None:
+        # Replace all children at once. Dropped children are disabled like in remove_child
+        old_widgets = set(self.widgets or ())
+        for widget in old_widgets.difference(widgets):
+            widget.set_interactive(False)
+        for widget in widgets:
+            if widget not in old_widgets:
+                widget.parent_widget = self
+                widget.set_interactive(True)
+        self.widgets = list(widgets) or None
+        self.set_changed()
+
     def get_widget_collide_point(
         self, widget: UiWidget, pos: tuple[int, int]
     ) -> tuple[int, int] | None:
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from pygame import Color, Rect, Surface, draw, font
+
+from .dynamicrect import DynamicTypes
+from .profiler import Profiler
+from .uiwidgetstatic import UiWidgetStatic
+
+if TYPE_CHECKING:
+    from .uiwidget import UiWidget
+
+HISTOGRAM_BOUNDS = [4, 8, 16, 33, 66]  # ms
+TOP_WIDGETS = 6
+
+
+# Profiler overlay. Shows the values of the previous frame
+class UiWidgetProfiler(UiWidgetStatic):
+    def __init__(self, parent: UiWidget, **kwargs):
+        super().__init__(
+            parent,
+            pos_x_type=DynamicTypes.TYPE_PIXEL_REVERSE,
+            size_w=340,
+            size_h=300,
+            bg_color=Color("Black"),
+            border_all=2,
+            border_color=Color("Yellow"),
+            **kwargs,
+        )
+        self.is_visible = False
+        self.is_interactive = False
+        self.text_color = Color("White")
+        self.text_font = font.SysFont(None, 20)
+
+    def compose(self, surface: Surface) -> None:
+        frame_times = Profiler.frame_times
+        if frame_times:
+            last_time = frame_times[-1]
+            p95_time = sorted(frame_times)[int(len(frame_times) * 0.95)]
+        else:
+            last_time = p95_time = 0
+        line_h = self.text_font.get_linesize()
+        y = self.compose_line(
+            surface,
+            f"FPS {Profiler.get_fps():.1f}   frame {last_time:.1f} ms   "
+            f"p95 {p95_time:.1f} ms",
+            0,
+        )
+        y = self.compose_line(surface, f"Events {Profiler.event_time:.2f} ms", y)
+
+        counts = Profiler.get_histogram(HISTOGRAM_BOUNDS)
+        max_count = max(counts) or 1
+        bar_max_w = surface.get_width() - 70
+        labels = [f"<{b}" for b in HISTOGRAM_BOUNDS] + [f">{HISTOGRAM_BOUNDS[-1]}"]
+        for label, count in zip(labels, counts):
+            self.compose_line(surface, f"{label} ms", y)
+            bar_w = bar_max_w * count // max_count
+            if bar_w > 0:
+                draw.rect(surface, Color("Green"), Rect(60, y + 2, bar_w, line_h - 4))
+            y += line_h
+
+        for name, widget_time in Profiler.get_top_widgets(TOP_WIDGETS):
+            y = self.compose_line(surface, f"{widget_time:6.2f} ms  {name}", y)
+
+    def compose_line(self, surface: Surface, text: str, y: int) -> int:
+        surface.blit(self.text_font.render(text, True, self.text_color), (4, y))
+        return y + self.text_font.get_linesize()
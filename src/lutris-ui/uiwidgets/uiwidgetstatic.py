@@ -2,8 +2,10 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from pygame import Rect, Surface, transform
+from pygame import Rect, Surface
 
+from .surfacefactory import SurfaceFactory
+from .surfacepool import SurfacePool
 from .uiwidget import UiWidget
 
 if TYPE_CHECKING:
@@ -11,6 +13,8 @@ if TYPE_CHECKING:
 
 
 class UiWidgetStatic(UiWidget):
+    blit_batched = True
+
     def __init__(
         self,
         parent: UiWidget,
@@ -23,26 +27,29 @@ class UiWidgetStatic(UiWidget):
         self._widget_surface_with_borders: Surface | None = None
         self.alpha: int | None = alpha
         self.surface_flags: int = surface_flags
+        self._surface_generation = SurfaceFactory.generation
 
     def get_surface(self, with_borders: bool = False) -> Surface:
         w, h = self.get_rect(with_borders=True).size
+        if self._surface_generation != SurfaceFactory.generation:
+            # Display format changed
+            self._surface_generation = SurfaceFactory.generation
+            self._widget_surface_with_borders = None
+        elif self._widget_surface_with_borders is not None and (
+            self._widget_surface_with_borders.get_width() != w
+            or self._widget_surface_with_borders.get_height() != h
+        ):
+            # Content is redrawn in new size, no need to scale
+            SurfacePool.release(self._widget_surface_with_borders)
+            self._widget_surface_with_borders = None
         if self._widget_surface_with_borders is None:
             self._widget_surface = None
-            self._widget_surface_with_borders = Surface(
+            self._widget_surface_with_borders = SurfacePool.acquire(
                 (w, h), flags=self.surface_flags
             )
             if self.alpha is not None:
                 self._widget_surface_with_borders.set_alpha(self.alpha)
             self.set_changed()
-        elif (
-            self._widget_surface_with_borders.get_width() != w
-            or self._widget_surface_with_borders.get_height() != h
-        ):
-            self._widget_surface = None
-            self._widget_surface_with_borders = transform.scale(
-                self._widget_surface_with_borders, (w, h)
-            )
-            self.set_changed()
         if with_borders is True:
             return self._widget_surface_with_borders
         elif self._widget_surface is None:
@@ -63,10 +70,23 @@ class UiWidgetStatic(UiWidget):
         self.alpha = alpha
         self.get_surface(with_borders=True).set_alpha(alpha)
 
+    def set_parent_changed(self) -> None:
+        self.set_child_changed()  # Blit the own surface again
+
+    def release_surfaces(self) -> None:
+        super().release_surfaces()
+        self._widget_surface = None
+        self._widget_surface_with_borders = None
+
     def draw(self) -> None:
+        blit = self.draw_blit()
+        if blit is not None:
+            self.get_parent_surface().blit(*blit)
+
+    def draw_blit(self) -> tuple[Surface, Rect] | None:
         self.updated = False
         if self.is_visible is False:
-            return
+            return None
 
         compose_surface = self.get_surface(
             with_borders=False
@@ -80,21 +100,23 @@ class UiWidgetStatic(UiWidget):
         if self.widgets is not None and (
             self._child_changed is True or self.is_changed() is True
         ):
-            for widget in self.widgets:
-                widget.draw()
-                if widget.updated is True:
-                    self.updated = True
+            if self.draw_children(self.widgets) is True:
+                self.updated = True
 
-        parent_surface = self.get_parent_surface()
+        blit = None
         if (
             self._child_changed is True
-            or self.is_parent_changed() is True
             or self.is_changed() is True
+            or self.is_parent_changed() is True
         ):
-            parent_surface.blit(
-                self.get_surface(with_borders=True), self.get_rect(with_borders=True)
+            assert self.parent_widget
+            offset_x, offset_y = self.parent_widget.get_child_offset()
+            blit = (
+                self.get_surface(with_borders=True),
+                self.get_rect(with_borders=True).move(-offset_x, -offset_y),
             )
             self.updated = True
 
         if self.updated is True:
             self.unset_changed()
+        return blit
@@ -1,10 +1,26 @@
 from __future__ import annotations
 
+from math import exp, hypot
+from typing import TYPE_CHECKING, cast
+
 from pygame import Color, Rect, Surface, constants, draw, event
 
 from .dynamicrect import DynamicTypes
+from .surfacefactory import SurfaceFactory
+from .surfacepool import SurfacePool
 from .uiwidget import UiWidget
 
+if TYPE_CHECKING:
+    from .uiapp import UiApp
+
+SCROLL_SMOOTH_RATE = 15  # 1/s, how fast the animation approach the target
+SCROLL_FRICTION = 4  # 1/s, velocity decay of touch flicks
+SCROLL_MIN_VELOCITY = 30  # px/s, flick stops below
+SCROLL_MAX_TICK = 100  # ms, slower frames are animated as this
+SCROLL_START_TICK = 33  # ms, first frame. The previous one contains the idle time
+SCROLL_FLICK_TIME = 0.1  # s, touch drag time used to get the flick velocity
+WINDOW_SCREENS = 3  # Surface height in visible heights, moved by scrolling
+
 
 class UiWidgetsScrollbar(UiWidget):
     def __init__(
@@ -113,18 +129,17 @@ class UiWidgetsScrollbar(UiWidget):
                         viewport_widget = self.parent_widget.viewport_widget
                         assert viewport_widget
                         if self.scrollbar_is_horizontal is True:
-                            viewport_widget.shift_x += (
-                                (event.pos[0] - self._drag_pos[0])
+                            viewport_widget.scroll_by(
+                                shift_x=(event.pos[0] - self._drag_pos[0])
                                 * self.max_value
                                 / self.bar_value
                             )
                         else:
-                            viewport_widget.shift_y += (
-                                (event.pos[1] - self._drag_pos[1])
+                            viewport_widget.scroll_by(
+                                shift_y=(event.pos[1] - self._drag_pos[1])
                                 * self.max_value
                                 / self.bar_value
                             )
-                        viewport_widget.set_changed()
                     self._drag_pos = event.pos
                     return True
         return False
@@ -140,6 +155,17 @@ class UiWidgetViewport(UiWidget):
         self.viewport_width: int = 0
         self.viewport_height: int = 0
         self._viewport_surface: Surface | None = None
+        self._window_y = 0  # Viewport row at the top of the surface
+        self._surface_generation = SurfaceFactory.generation
+        self._presented = False  # Parent surface contains the visible area
+        self._pending_widgets: set[UiWidget] = set()  # Not drawn since full redraw
+        self.smooth_scroll = False
+        self._scroll_pos: tuple[float, float] = (0, 0)  # Animated position
+        self._scroll_target: tuple[float, float] | None = None
+        self._scroll_velocity: tuple[float, float] = (0, 0)
+        self._scroll_started = False
+        self._drag_samples: list[tuple[float, float, float]] = []  # time, x, y
+        self._dragged = False
 
     def set_size(self, **kwargs) -> None:
         w, h = kwargs["size_w"], kwargs["size_h"]
@@ -162,13 +188,77 @@ class UiWidgetViewport(UiWidget):
             self.set_changed()
 
     def get_surface(self, with_borders: bool = False) -> Surface:
-        size = self.get_size(with_borders)
+        # The surface contains the viewport rows from _window_y only
+        width, _ = self.get_size(with_borders)
+        assert self._viewport_surface
         if with_borders is True:
-            pos = (0, 0)
+            return self._viewport_surface
+        return self._viewport_surface.subsurface(
+            Rect(
+                self._dyn_rect.border_left,
+                0,
+                width,
+                self._viewport_surface.get_height(),
+            )
+        )
+
+    def get_child_offset(self) -> tuple[int, int]:
+        return 0, self._window_y - self._dyn_rect.border_top
+
+    def adjust_window(self, needed_rect: Rect) -> None:
+        # Move the surface rows to contain needed_rect. The rows still in the surface
+        # are moved, the new rows are filled by the widgets drawn next
+        self.get_rect()  # Surface in current size
+        assert self._viewport_surface
+        window_width, window_height = self._viewport_surface.get_size()
+        if needed_rect.height > window_height:
+            needed_rect = self.get_visible_rect()
+        if (
+            needed_rect.top >= self._window_y
+            and needed_rect.bottom <= self._window_y + window_height
+        ):
+            return
+        window_y = needed_rect.centery - window_height // 2
+        window_y = min(max(window_y, 0), self.viewport_height - window_height)
+        move_y = window_y - self._window_y
+        self._window_y = window_y
+        if self.is_changed() is True or abs(move_y) >= window_height:
+            self.set_changed()
+            return
+
+        self._viewport_surface.scroll(0, -move_y)
+        if move_y > 0:
+            new_rows = Rect(0, window_height - move_y, window_width, move_y)
         else:
-            pos = (self._dyn_rect.border_left, self._dyn_rect.border_top)
+            new_rows = Rect(0, 0, window_width, -move_y)
+        self._viewport_surface.fill(self.bg_color or 0, new_rows)
+        self.compose_borders()
+        if self.widgets:
+            # Blit again if visible. Cheaper than finding the widgets in new rows
+            self._pending_widgets = set(self.widgets)
+
+    def compose_borders(self) -> bool:
+        if self.border_color is None:
+            return False
         assert self._viewport_surface
-        return self._viewport_surface.subsurface(Rect(pos, size))
+        width, height = self.viewport_width, self.viewport_height
+        dyn_rect = self._dyn_rect
+        border_rects = [
+            Rect(0, 0, width, dyn_rect.border_top),
+            Rect(0, 0, dyn_rect.border_left, height),
+            Rect(width - dyn_rect.border_right, 0, dyn_rect.border_right, height),
+            Rect(0, height - dyn_rect.border_bottom, width, dyn_rect.border_bottom),
+        ]
+        drawn = False
+        for rect in border_rects:
+            if rect.width > 0 and rect.height > 0:
+                draw.rect(
+                    self._viewport_surface,
+                    self.border_color,
+                    rect.move(0, -self._window_y),
+                )
+                drawn = True
+        return drawn
 
     def get_rect(self, with_borders: bool = False) -> Rect:
         parent_width, parent_height = self.get_parent_size()
@@ -177,18 +267,103 @@ class UiWidgetViewport(UiWidget):
                 self.viewport_width = parent_width
             if self.viewport_height is None:
                 self.viewport_height = parent_height
+        window_height = min(self.viewport_height, parent_height * WINDOW_SCREENS)
         if (
             self._viewport_surface is None
             or self._viewport_surface.get_width() != self.viewport_width
-            or self._viewport_surface.get_height() != self.viewport_height
+            or self._viewport_surface.get_height() != window_height
+            or self._surface_generation != SurfaceFactory.generation
         ):
-            self._viewport_surface = Surface(
-                (self.viewport_width, self.viewport_height)
+            if (
+                self._viewport_surface is not None
+                and self._surface_generation == SurfaceFactory.generation
+            ):
+                SurfacePool.release(self._viewport_surface)
+            self._surface_generation = SurfaceFactory.generation
+            self._viewport_surface = SurfacePool.acquire(
+                (self.viewport_width, window_height)
             )
+            self._window_y = min(self._window_y, self.viewport_height - window_height)
             self.set_changed()
         self._dyn_rect.set_parent_size(self.viewport_width, self.viewport_height)
         return self._dyn_rect.get_rect(with_borders)
 
+    def release_surfaces(self) -> None:
+        super().release_surfaces()
+        self._viewport_surface = None
+        self._presented = False
+
+    def scroll_to(
+        self,
+        shift_x: float | None = None,
+        shift_y: float | None = None,
+        animate: bool = False,
+    ) -> None:
+        if animate is True and self.smooth_scroll is True:
+            target_x, target_y = self.get_scroll_target()
+            if shift_x is not None:
+                target_x = shift_x
+            if shift_y is not None:
+                target_y = shift_y
+            self._start_scrolling()
+            self._scroll_target = (target_x, target_y)
+            return
+
+        self.stop_scrolling()
+        if shift_x is None:
+            shift_x = self.shift_x
+        if shift_y is None:
+            shift_y = self.shift_y
+        self._set_shift(shift_x, shift_y)
+
+    def scroll_by(
+        self, shift_x: float = 0, shift_y: float = 0, animate: bool = False
+    ) -> None:
+        target_x, target_y = self.get_scroll_target()
+        self.scroll_to(target_x + shift_x, target_y + shift_y, animate)
+
+    def fling(self, velocity_x: float, velocity_y: float) -> None:
+        if self.smooth_scroll is False:
+            return
+        self._start_scrolling()
+        self._scroll_velocity = (velocity_x, velocity_y)
+
+    def stop_scrolling(self) -> None:
+        self._scroll_target = None
+        self._scroll_velocity = (0, 0)
+
+    def is_scrolling(self) -> bool:
+        return self._scroll_target is not None or self._scroll_velocity != (0, 0)
+
+    def get_scroll_target(self) -> tuple[float, float]:
+        if self._scroll_target is not None:
+            return self._scroll_target
+        return self.shift_x, self.shift_y
+
+    def get_max_shift(self) -> tuple[int, int]:
+        parent_width, parent_height = self.get_parent_size()
+        return (
+            max(self.viewport_width - parent_width, 0),
+            max(self.viewport_height - parent_height, 0),
+        )
+
+    def _start_scrolling(self) -> None:
+        if self.is_scrolling() is False:
+            self._scroll_pos = (self.shift_x, self.shift_y)
+            self._scroll_started = True
+        self.stop_scrolling()
+        self.set_process_tick_enabled()
+        cast("UiApp", self.get_root_widget()).controls.request_frame()
+
+    def _set_shift(self, shift_x: float, shift_y: float) -> None:
+        self.shift_x = shift_x
+        self.shift_y = shift_y
+        if self.parent_widget:
+            self.parent_widget.set_child_changed()  # Redraw without changes
+
+    def get_visible_rect(self) -> Rect:
+        return Rect((self.shift_x, self.shift_y), self.get_parent_size())
+
     def adjust_shift(self):
         # Adjust shift
         shift_changed = False
@@ -205,6 +380,8 @@ class UiWidgetViewport(UiWidget):
         if self.shift_y < 0:
             self.shift_y = 0
 
+        self.shift_x = round(self.shift_x)
+        self.shift_y = round(self.shift_y)
         if self.shift_x != self._old_shift_x or self.shift_y != self._old_shift_y:
             shift_changed = True
             self._old_shift_x = self.shift_x
@@ -216,20 +393,121 @@ class UiWidgetViewport(UiWidget):
         if self.is_visible is False:
             return
 
-        if self.adjust_shift():
-            self.set_changed()
+        old_shift_x, old_shift_y = self._old_shift_x, self._old_shift_y
+        shift_changed = self.adjust_shift()
+        parent_changed = self.is_parent_changed()
+        visible_widgets: list[tuple[UiWidget, Rect]] = []
+        if (
+            self._child_changed is True
+            or self.is_changed() is True
+            or parent_changed is True
+            or shift_changed is True
+        ):
+            visible_rect = self.get_visible_rect()
+            if self.widgets:
+                # Content size resolved once, not by each child over get_parent_size()
+                content_w, content_h = self.get_size(with_borders=False)
+                for widget in self.widgets:
+                    widget._dyn_rect.set_parent_size(content_w, content_h)
+                    widget_rect = widget._dyn_rect.get_rect(with_borders=True)
+                    if widget_rect.colliderect(visible_rect):
+                        visible_widgets.append((widget, widget_rect))
+            # The surface rows needs to contain the visible widgets
+            needed_rect = visible_rect.unionall(
+                [
+                    widget_rect.move(0, self._dyn_rect.border_top)
+                    for _, widget_rect in visible_widgets
+                ]
+            )
+            self.adjust_window(needed_rect)
+        content_changed = self.is_changed()
+        if content_changed is True:
+            surface = self.get_surface(with_borders=False)
+            if self.bg_color:
+                surface.fill(self.bg_color)
+            self.compose(surface)
+            self.compose_borders()
+            if self.widgets:
+                self._pending_widgets = set(self.widgets)
 
-        super().draw()
-        if self.updated or self.is_changed():
-            parent_surface = self.get_parent_surface()
-            parent_width, parent_height = self.get_parent_size()
-            assert self._viewport_surface
-            widget_surface = self._viewport_surface.subsurface(
-                (self.shift_x, self.shift_y, parent_width, parent_height)
+        # Draw visible children only. The other are drawn if scrolled in
+        if self._pending_widgets:
+            for widget, _ in visible_widgets:
+                if widget in self._pending_widgets:
+                    self._pending_widgets.discard(widget)
+                    widget.set_parent_changed()
+        self.draw_children(widget for widget, _ in visible_widgets)
+        dirty_rects = [
+            widget_rect.move(-self.shift_x, -self.shift_y)
+            for widget, widget_rect in visible_widgets
+            if widget.updated is True
+        ]
+
+        parent_surface = self.get_parent_surface()
+        parent_width, parent_height = self.get_parent_size()
+        assert self._viewport_surface
+        shift_x = self.shift_x - old_shift_x
+        shift_y = self.shift_y - old_shift_y
+        if (
+            content_changed is True
+            or parent_changed is True
+            or self._presented is False
+            or abs(shift_x) >= parent_width
+            or abs(shift_y) >= parent_height
+        ):
+            dirty_rects = [Rect(0, 0, parent_width, parent_height)]
+        else:
+            if shift_changed is True:
+                # Move already presented pixels and redraw the exposed strips only
+                parent_surface.scroll(-shift_x, -shift_y)
+                if shift_x > 0:
+                    dirty_rects.append(
+                        Rect(parent_width - shift_x, 0, shift_x, parent_height)
+                    )
+                elif shift_x < 0:
+                    dirty_rects.append(Rect(0, 0, -shift_x, parent_height))
+                if shift_y > 0:
+                    dirty_rects.append(
+                        Rect(0, parent_height - shift_y, parent_width, shift_y)
+                    )
+                elif shift_y < 0:
+                    dirty_rects.append(Rect(0, 0, parent_width, -shift_y))
+            if dirty_rects:
+                # Widgets above are redrawn by is_parent_changed(). Clean up below
+                dirty_rects += self.get_overlay_rects()
+
+        for rect in dirty_rects:
+            parent_surface.blit(
+                self._viewport_surface,
+                rect.topleft,
+                rect.move(self.shift_x, self.shift_y - self._window_y),
             )
-            parent_surface.blit(widget_surface, (0, 0))
-            self.unset_changed()
+        if dirty_rects:
+            self._presented = True
             self.updated = True
+        self.unset_changed()
+
+    def get_overlay_rects(self) -> list[Rect]:
+        # Visible widgets drawn above the viewport onto the same screen surface
+        overlay_rects = []
+        own_surface = self.get_parent_surface()
+        own_offset_x, own_offset_y = own_surface.get_abs_offset()
+        widget: UiWidget = self
+        while widget.parent_widget and widget.parent_widget.widgets:
+            parent_surface = widget.parent_widget.get_surface(with_borders=False)
+            if parent_surface.get_abs_parent() is not own_surface.get_abs_parent():
+                break
+            offset_x, offset_y = parent_surface.get_abs_offset()
+            siblings = widget.parent_widget.widgets
+            for sibling in siblings[siblings.index(widget) + 1 :]:
+                if sibling.is_visible is True:
+                    overlay_rects.append(
+                        sibling.get_rect(with_borders=True).move(
+                            offset_x - own_offset_x, offset_y - own_offset_y
+                        )
+                    )
+            widget = widget.parent_widget
+        return overlay_rects
 
     def get_widget_collide_point(
         self, widget: UiWidget, pos: tuple[int, int]
@@ -240,13 +518,90 @@ class UiWidgetViewport(UiWidget):
         if widget_rect.collidepoint(shift_pos):
             return shift_pos[0] - widget_rect.x, shift_pos[1] - widget_rect.y
 
+    def process_tick(self) -> None:
+        super().process_tick()
+        if self.is_scrolling() is False:
+            self.set_process_tick_enabled(False)
+            return
+
+        controls = cast("UiApp", self.get_root_widget()).controls
+        if self._scroll_started is True:
+            self._scroll_started = False
+            tick_time = SCROLL_START_TICK / 1000
+        else:
+            tick_time = min(controls.get_tick_time(), SCROLL_MAX_TICK) / 1000
+
+        max_x, max_y = self.get_max_shift()
+        pos_x, pos_y = self._scroll_pos
+        if self._scroll_target is not None:
+            target_x = min(max(self._scroll_target[0], 0), max_x)
+            target_y = min(max(self._scroll_target[1], 0), max_y)
+            # Frame time independent ease out
+            factor = 1 - exp(-SCROLL_SMOOTH_RATE * tick_time)
+            pos_x += (target_x - pos_x) * factor
+            pos_y += (target_y - pos_y) * factor
+            if abs(target_x - pos_x) < 0.5 and abs(target_y - pos_y) < 0.5:
+                pos_x, pos_y = target_x, target_y
+                self._scroll_target = None
+        else:
+            velocity_x, velocity_y = self._scroll_velocity
+            pos_x += velocity_x * tick_time
+            pos_y += velocity_y * tick_time
+            decay = exp(-SCROLL_FRICTION * tick_time)
+            velocity_x *= decay
+            velocity_y *= decay
+            if pos_x < 0 or pos_x > max_x:
+                pos_x = min(max(pos_x, 0), max_x)
+                velocity_x = 0
+            if pos_y < 0 or pos_y > max_y:
+                pos_y = min(max(pos_y, 0), max_y)
+                velocity_y = 0
+            if hypot(velocity_x, velocity_y) < SCROLL_MIN_VELOCITY:
+                velocity_x, velocity_y = 0, 0
+            self._scroll_velocity = (velocity_x, velocity_y)
+
+        self._scroll_pos = (pos_x, pos_y)
+        self._set_shift(pos_x, pos_y)
+        if self.is_scrolling() is True:
+            controls.request_frame()
+
     def process_event_pos(self, event: event.Event, pos: tuple[int, int]) -> bool:
         if event.type == constants.MOUSEMOTION and event.touch is True:
-            self.shift_x = self.shift_x + (event.rel[0] * 5)
-            self.shift_y = self.shift_y - (event.rel[1] * 5)
-            self.set_changed()
+            shift_x, shift_y = event.rel[0] * 5, -event.rel[1] * 5
+            self.scroll_by(shift_x, shift_y)
+            now = cast("UiApp", self.get_root_widget()).controls.get_time()
+            self._drag_samples = [
+                sample
+                for sample in self._drag_samples
+                if now - sample[0] < SCROLL_FLICK_TIME
+            ]
+            self._drag_samples.append((now, shift_x, shift_y))
+            self._dragged = True
             return True
 
+        if event.type == constants.MOUSEBUTTONDOWN and event.touch is True:
+            self.stop_scrolling()  # Catch running flick
+            self._drag_samples.clear()
+            self._dragged = False
+
+        if event.type == constants.MOUSEBUTTONUP and event.touch is True:
+            if self._dragged is True:
+                # Keep scrolling by the last drag speed. The release is not a tap
+                self._dragged = False
+                now = cast("UiApp", self.get_root_widget()).controls.get_time()
+                samples = [
+                    sample
+                    for sample in self._drag_samples
+                    if now - sample[0] < SCROLL_FLICK_TIME
+                ]
+                if samples:
+                    drag_time = max(now - samples[0][0], 1 / 60)
+                    self.fling(
+                        sum(sample[1] for sample in samples) / drag_time,
+                        sum(sample[2] for sample in samples) / drag_time,
+                    )
+                return True
+
         return super().process_event_pos(event, pos)
 
 
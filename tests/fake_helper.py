@@ -0,0 +1,21 @@
+# Stand-in for the launch helper, speaking the same protocol.
+# fake_helper.py <pid|error|exit> <ready delay> <answer delay> <log file>
+import sys
+import time
+
+mode, ready_delay, answer_delay, log_file = sys.argv[1:]
+time.sleep(float(ready_delay))
+print("ready", flush=True)
+for line in sys.stdin:
+    with open(log_file, "a") as log:
+        log.write(f"request {line.strip()}\n")
+    time.sleep(float(answer_delay))
+    match mode:
+        case "pid":
+            with open(log_file, "a") as log:
+                log.write(f"launched {line.strip()}\n")
+            print(4242, flush=True)
+        case "error":
+            print("error unknown game", flush=True)
+        case "exit":
+            sys.exit(1)
@@ -0,0 +1,123 @@
+import ctypes
+import ctypes.util
+import glob
+import os
+
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+# The dummy window never has the focus, SDL would drop the stick motion
+os.environ.setdefault("SDL_JOYSTICK_ALLOW_BACKGROUND_EVENTS", "1")
+
+import pygame  # noqa: E402
+from pygame import constants  # noqa: E402
+from uiwidgets import Controls  # noqa: E402
+
+SDL_JOYSTICK_TYPE_GAMECONTROLLER = 1
+AXIS_MAX = 32767
+
+
+def load_sdl() -> ctypes.CDLL | None:
+    # The SDL library pygame is linked with, the virtual devices need to be in there
+    libs = glob.glob(
+        os.path.join(
+            os.path.dirname(pygame.__file__), "..", "pygame.libs", "libSDL2-2*"
+        )
+    )
+    lib_name = libs[0] if libs else ctypes.util.find_library("SDL2")
+    if lib_name is None:
+        return None
+    sdl = ctypes.CDLL(lib_name)
+    if not hasattr(sdl, "SDL_JoystickAttachVirtual"):
+        return None
+    sdl.SDL_JoystickFromInstanceID.restype = ctypes.c_void_p
+    sdl.SDL_JoystickSetVirtualAxis.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_int,
+        ctypes.c_int16,
+    ]
+    return sdl
+
+
+sdl = load_sdl()
+pytestmark = pytest.mark.skipif(sdl is None, reason="SDL virtual joysticks missing")
+
+
+@pytest.fixture
+def controls():
+    pygame.display.init()
+    pygame.display.set_mode((100, 100))
+    ctr = Controls(repeatable_commands=["UP", "DOWN"])
+    ctr.init()
+    yield ctr
+    while pygame.joystick.get_count():
+        sdl.SDL_JoystickDetachVirtual(0)
+    pygame.quit()
+
+
+def attach_pad(ctr: Controls) -> int:
+    device_index = sdl.SDL_JoystickAttachVirtual(
+        SDL_JOYSTICK_TYPE_GAMECONTROLLER, 6, 15, 1
+    )
+    assert device_index >= 0
+    known = set(ctr.joysticks)
+    next_frame(ctr)
+    (instance_id,) = set(ctr.joysticks) - known
+    return instance_id
+
+
+def next_frame(ctr: Controls) -> list[pygame.event.Event]:
+    sdl.SDL_JoystickUpdate()  # Apply the virtual device state
+    ctr.request_frame()
+    ctr.update_controls()
+    return ctr.events
+
+
+def get_commands(events: list[pygame.event.Event]) -> list[str]:
+    return [e.command for e in events if e.type == Controls.COMMAND_EVENT]
+
+
+def test_attach_opens_only_the_new_pad(controls):
+    first_id = attach_pad(controls)
+    first = controls.joysticks[first_id]
+    second_id = attach_pad(controls)
+    assert first_id != second_id
+    assert controls.joysticks[first_id] is first  # Not re-created
+    assert first.get_init() is True
+    assert [js.get_instance_id() for js in controls.get_joysticks()] == [
+        first_id,
+        second_id,
+    ]
+
+
+def test_detach_held_pad_releases_down(controls):
+    attach_pad(controls)
+    held_id = attach_pad(controls)
+    held = ctypes.c_void_p(sdl.SDL_JoystickFromInstanceID(held_id))
+    sdl.SDL_JoystickSetVirtualAxis(held, constants.CONTROLLER_AXIS_LEFTY, AXIS_MAX)
+    commands = get_commands(next_frame(controls))
+    assert commands == ["DOWN"]
+    assert controls._pressed_command == "DOWN"
+
+    device_index = [js.get_instance_id() for js in controls.get_joysticks()].index(
+        held_id
+    )
+    sdl.SDL_JoystickDetachVirtual(device_index)
+    next_frame(controls)
+    assert held_id not in controls.joysticks
+    assert controls._pressed_command is None  # DOWN released
+    assert controls._last_axis is None
+    assert get_commands(next_frame(controls)) == []  # Not repeated
+
+
+def test_remaining_pads_survive_hotplug(controls):
+    first_id = attach_pad(controls)
+    second_id = attach_pad(controls)
+    before = dict(controls.joysticks)
+    third_id = attach_pad(controls)
+    sdl.SDL_JoystickDetachVirtual(1)  # Device index of the second pad
+    next_frame(controls)
+    assert set(controls.joysticks) == {first_id, third_id}
+    assert controls.joysticks[first_id] is before[first_id]
+    assert before[second_id].get_init() is False
+    assert controls.joysticks[first_id].get_init() is True
@@ -0,0 +1,35 @@
+from pygame import constants, event
+from uiwidgets import Controls
+
+
+def stick_y(value: float) -> event.Event:
+    return event.Event(
+        constants.JOYAXISMOTION,
+        instance_id=0,
+        axis=constants.CONTROLLER_AXIS_LEFTY,
+        value=value,
+        joy=0,
+    )
+
+
+def get_commands(controls: Controls, axis_event: event.Event) -> list[str]:
+    events = [axis_event]
+    controls._command_added = False  # New game step
+    controls._apply_custom_events(events)
+    return [e.command for e in events if e.type == Controls.COMMAND_EVENT]
+
+
+def test_reversed_stick_without_release():
+    controls = Controls(repeatable_commands=["UP", "DOWN"])
+    assert get_commands(controls, stick_y(1.0)) == ["DOWN"]
+    assert get_commands(controls, stick_y(0.8)) == []  # Still held
+    assert get_commands(controls, stick_y(-1.0)) == ["UP"]
+    assert controls._pressed_command == "UP"
+
+
+def test_centered_stick_releases():
+    controls = Controls(repeatable_commands=["UP", "DOWN"])
+    assert get_commands(controls, stick_y(1.0)) == ["DOWN"]
+    assert get_commands(controls, stick_y(0.0)) == []
+    assert controls._pressed_command is None
+    assert get_commands(controls, stick_y(1.0)) == ["DOWN"]
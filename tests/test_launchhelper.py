@@ -0,0 +1,95 @@
+import sys
+import time
+from os import path
+
+import launchhelper
+import pytest
+from launchhelper import LaunchHelper
+
+FAKE_HELPER = path.join(path.dirname(__file__), "fake_helper.py")
+
+
+def start_helper(tmp_path, mode: str, ready_delay=0.0, answer_delay=0.0):
+    log_file = tmp_path / "helper.log"
+    log_file.touch()
+    helper = LaunchHelper(
+        f"{sys.executable} {FAKE_HELPER} {mode} {ready_delay} {answer_delay} {log_file}"
+    )
+    helper.start()
+    return helper, log_file
+
+
+def wait_ready(helper: LaunchHelper) -> None:
+    deadline = time.monotonic() + 5
+    while helper.is_ready() is False:
+        assert time.monotonic() < deadline, "helper not ready"
+        time.sleep(0.01)
+
+
+def test_launch_returns_pid(tmp_path):
+    helper, log_file = start_helper(tmp_path, "pid")
+    wait_ready(helper)
+    assert helper.launch(7) == 4242
+    assert log_file.read_text().splitlines() == ["request 7", "launched 7"]
+    helper.stop()
+
+
+def test_not_ready_helper_gets_no_request(tmp_path):
+    helper, log_file = start_helper(tmp_path, "pid", ready_delay=1)
+    assert helper.launch(7) is None
+    time.sleep(1.5)
+    assert log_file.read_text() == ""
+    helper.stop()
+
+
+def test_error_answer_falls_back(tmp_path):
+    helper, _ = start_helper(tmp_path, "error")
+    wait_ready(helper)
+    assert helper.launch(7) is None
+    assert helper._process is None
+
+
+def test_timeout_kills_helper(tmp_path, monkeypatch):
+    monkeypatch.setattr(launchhelper, "HELPER_TIMEOUT", 0.2)
+    helper, log_file = start_helper(tmp_path, "pid", answer_delay=1)
+    wait_ready(helper)
+    assert helper.launch(7) is None
+    assert helper._process is None
+    time.sleep(1.5)
+    # Killed before the launch, the fallback does not start the game twice
+    assert log_file.read_text().splitlines() == ["request 7"]
+
+
+@pytest.mark.parametrize("mode", ["exit", "killed"])
+def test_dead_helper_falls_back(tmp_path, mode):
+    helper, _ = start_helper(tmp_path, "exit")
+    wait_ready(helper)
+    process = helper._process
+    assert process
+    if mode == "killed":
+        process.kill()
+        process.wait()
+        assert helper.launch(7) is None
+        assert helper._process is not process  # Restarted for the next launch
+        helper.stop()
+    else:
+        assert helper.launch(7) is None
+        assert helper._process is None
+
+
+def test_late_pid_is_used(tmp_path, monkeypatch):
+    helper, log_file = start_helper(tmp_path, "pid")
+    wait_ready(helper)
+    select_calls = []
+
+    def timed_out_select(rlist, wlist, xlist, timeout=None):
+        select_calls.append(timeout)
+        if len(select_calls) == 1:
+            time.sleep(0.5)  # The pid is written meanwhile
+            return [], [], []
+        return original_select(rlist, wlist, xlist, timeout)
+
+    original_select = launchhelper.select.select
+    monkeypatch.setattr(launchhelper.select, "select", timed_out_select)
+    assert helper.launch(7) == 4242
+    assert log_file.read_text().splitlines() == ["request 7", "launched 7"]